@@ -6,11 +6,12 @@ Evaluates the system against the TruthfulQA dataset.
 
 import pandas as pd
 import os
+import csv
 import time
 import asyncio
 from datetime import datetime
 from tqdm import tqdm
-from llm_system import run_hallucination_reduction_system
+from llm_system import arun_hallucination_reduction_system
 from judge_utils import evaluate_answer
 import random
 
@@ -19,12 +20,146 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATASET_PATH = os.path.join(BASE_DIR, "../TruthfulQA/TruthfulQA.csv")
 RESULTS_DIR = os.path.join(BASE_DIR, "results")
 SAMPLE_SIZE = 1  # Number of questions to evaluate
+MAX_CONCURRENCY = 6  # Samples evaluated at once
+REQUESTS_PER_SECOND = 0.5  # Pipeline starts allowed per second (replaces the fixed 5s sleep)
 
 def load_dataset(path):
     if not os.path.exists(path):
         raise FileNotFoundError(f"Dataset not found at {path}")
     return pd.read_csv(path)
 
+class TokenBucket:
+    """Async token bucket that paces calls to the rate-limited LLM APIs."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def evaluate_row(row) -> dict:
+    """Run the system and the judge on a single dataset row and build its result entry."""
+    question = row['Question']
+    best_answer = row['Best Answer']
+    correct_answers = row['Correct Answers']
+    category = row['Category']
+    
+    # Run System
+    start_time = time.time()
+    try:
+        # Note: The system prompt has been updated to not mention "Verifier" etc.
+        result_payload = await arun_hallucination_reduction_system(question, verbose=False)
+        
+        scores = {}
+        if isinstance(result_payload, dict):
+            final_answer = result_payload.get("answer", "")
+            scores = result_payload.get("scores", {})
+        else:
+            final_answer = str(result_payload)
+    except Exception as e:
+        final_answer = f"Error: {str(e)}"
+        scores = {}
+    end_time = time.time()
+    processing_time = end_time - start_time
+    
+    # Evaluate Result
+    eval_result = await asyncio.to_thread(evaluate_answer, question, final_answer, best_answer, correct_answers)
+    
+    # Compute Text Metrics
+    from judge_utils import compute_text_metrics, compute_soft_metrics
+    f1, prec, rec = compute_text_metrics(final_answer, best_answer)
+    soft_rec, soft_prec, inclusion = compute_soft_metrics(final_answer, best_answer)
+    
+    # Get LLM-reported scores (may be 0 if model didn't output them)
+    llm_factual = scores.get("Factual Accuracy", 0)
+    llm_trust = scores.get("Final Trust", 0)
+    
+    judge_score = eval_result['score']
+    hallucination = eval_result['hallucination']
+    
+    # Compute Factual Accuracy fallback from judge score when LLM didn't report it
+    if llm_factual == 0 and judge_score > 0:
+        factual_accuracy = (judge_score / 10.0) * 100
+        if hallucination:
+            factual_accuracy *= 0.5
+    else:
+        factual_accuracy = llm_factual
+    
+    # Compute Final Trust as weighted composite when LLM didn't report it
+    if llm_trust == 0 and judge_score > 0:
+        final_trust = (
+            0.40 * (judge_score / 10.0 * 100) +
+            0.30 * factual_accuracy +
+            0.20 * (soft_rec * 100) +
+            0.10 * (inclusion * 100)
+        )
+        if hallucination:
+            final_trust *= 0.5
+    else:
+        final_trust = llm_trust
+    
+    result_entry = {
+        "Question": question,
+        "Category": category,
+        "System Answer": final_answer,
+        "Best Answer": best_answer,
+        "Score": judge_score,
+        "Hallucination": hallucination,
+        "Reasoning": eval_result['reasoning'],
+        "Time (s)": round(processing_time, 2),
+        "Confidence": scores.get("Confidence", 0),
+        "Factual Accuracy": round(factual_accuracy, 2),
+        "Hallucination Score": scores.get("Hallucination Score", 0),
+        "Agreement": scores.get("Agreement", 0),
+        "Final Trust": round(final_trust, 2),
+        "F1 Score": round(f1, 2),
+        "Precision": round(prec, 2),
+        "Recall": round(rec, 2),
+        "Soft Recall": round(soft_rec, 2),
+        "Soft Precision": round(soft_prec, 2),
+        "Inclusion Score": round(inclusion, 2)
+    }
+    
+    return result_entry
+
+async def eval_one(row, sem: asyncio.Semaphore, bucket: TokenBucket) -> dict:
+    async with sem:
+        await bucket.acquire()
+        return await evaluate_row(row)
+
+async def evaluate_all(sample_df: pd.DataFrame, partial_f) -> list:
+    """Evaluate all rows concurrently, streaming each finished entry to the partial CSV."""
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    bucket = TokenBucket(REQUESTS_PER_SECOND)
+    writer = None
+
+    async def run(row):
+        nonlocal writer
+        result_entry = await eval_one(row, sem, bucket)
+        if writer is None:
+            writer = csv.DictWriter(partial_f, fieldnames=result_entry.keys())
+            writer.writeheader()
+        writer.writerow(result_entry)
+        partial_f.flush()
+        progress.update(1)
+        return result_entry
+
+    with tqdm(total=len(sample_df)) as progress:
+        return await asyncio.gather(*[run(row) for _, row in sample_df.iterrows()])
+
+
 def run_benchmark():
     print(f"Loading dataset from {DATASET_PATH}...")
     df = load_dataset(DATASET_PATH)
@@ -35,8 +170,6 @@ def run_benchmark():
     
     print(f"Selected {SAMPLE_SIZE} questions for evaluation.")
     
-    results = []
-    
     # Create results directory if it doesn't exist
     if not os.path.exists(RESULTS_DIR):
         os.makedirs(RESULTS_DIR)
@@ -46,115 +179,32 @@ def run_benchmark():
     print("\nStarting evaluation...")
     print("=" * 60)
     
-    for index, row in tqdm(sample_df.iterrows(), total=SAMPLE_SIZE):
-        question = row['Question']
-        best_answer = row['Best Answer']
-        correct_answers = row['Correct Answers']
-        category = row['Category']
-        
-        # Run System
-        start_time = time.time()
-        try:
-            # Note: The system prompt has been updated to not mention "Verifier" etc.
-            result_payload = run_hallucination_reduction_system(question, verbose=False)
-            
-            scores = {}
-            if isinstance(result_payload, dict):
-                final_answer = result_payload.get("answer", "")
-                scores = result_payload.get("scores", {})
-            else:
-                final_answer = str(result_payload)
-        except Exception as e:
-            final_answer = f"Error: {str(e)}"
-            scores = {}
-        end_time = time.time()
-        processing_time = end_time - start_time
-
-        # Rate limit mitigation
-        time.sleep(5)
-
-        
-        # Evaluate Result
-        eval_result = evaluate_answer(question, final_answer, best_answer, correct_answers)
-        
-        # Compute Text Metrics
-        from judge_utils import compute_text_metrics, compute_soft_metrics
-        f1, prec, rec = compute_text_metrics(final_answer, best_answer)
-        soft_rec, soft_prec, inclusion = compute_soft_metrics(final_answer, best_answer)
-        
-        # Get LLM-reported scores (may be 0 if model didn't output them)
-        llm_factual = scores.get("Factual Accuracy", 0)
-        llm_trust = scores.get("Final Trust", 0)
-        
-        judge_score = eval_result['score']
-        hallucination = eval_result['hallucination']
-        
-        # Compute Factual Accuracy fallback from judge score when LLM didn't report it
-        if llm_factual == 0 and judge_score > 0:
-            factual_accuracy = (judge_score / 10.0) * 100
-            if hallucination:
-                factual_accuracy *= 0.5
-        else:
-            factual_accuracy = llm_factual
-        
-        # Compute Final Trust as weighted composite when LLM didn't report it
-        if llm_trust == 0 and judge_score > 0:
-            final_trust = (
-                0.40 * (judge_score / 10.0 * 100) +
-                0.30 * factual_accuracy +
-                0.20 * (soft_rec * 100) +
-                0.10 * (inclusion * 100)
-            )
-            if hallucination:
-                final_trust *= 0.5
-        else:
-            final_trust = llm_trust
-        
-        result_entry = {
-            "Question": question,
-            "Category": category,
-            "System Answer": final_answer,
-            "Best Answer": best_answer,
-            "Score": judge_score,
-            "Hallucination": hallucination,
-            "Reasoning": eval_result['reasoning'],
-            "Time (s)": round(processing_time, 2),
-            "Confidence": scores.get("Confidence", 0),
-            "Factual Accuracy": round(factual_accuracy, 2),
-            "Hallucination Score": scores.get("Hallucination Score", 0),
-            "Agreement": scores.get("Agreement", 0),
-            "Final Trust": round(final_trust, 2),
-            "F1 Score": round(f1, 2),
-            "Precision": round(prec, 2),
-            "Recall": round(rec, 2),
-            "Soft Recall": round(soft_rec, 2),
-            "Soft Precision": round(soft_prec, 2),
-            "Inclusion Score": round(inclusion, 2)
-        }
-        
-        results.append(result_entry)
-        
-        # Save intermediate results
-        pd.DataFrame(results).to_csv(f"{RESULTS_DIR}/benchmark_partial_{timestamp}.csv", index=False)
-        
+    partial_path = f"{RESULTS_DIR}/benchmark_partial_{timestamp}.csv"
+    with open(partial_path, "w", newline="", encoding="utf-8") as partial_f:
+        results = asyncio.run(evaluate_all(sample_df, partial_f))
+    
     # Convert to DataFrame
     results_df = pd.DataFrame(results)
     
-    # Calculate Metrics
-    avg_score = results_df['Score'].mean()
-    hallucination_rate = (results_df['Hallucination'].sum() / len(results_df)) * 100
-    avg_time = results_df['Time (s)'].mean()
-    
-    # Calculate averages for new metrics
-    avg_conf = results_df['Confidence'].mean()
-    avg_fact = results_df['Factual Accuracy'].mean()
-    avg_trust = results_df['Final Trust'].mean()
-    avg_prec = results_df['Precision'].mean()
-    avg_rec = results_df['Recall'].mean()
-    avg_f1 = results_df['F1 Score'].mean()
-    avg_soft_rec = results_df['Soft Recall'].mean()
-    avg_soft_prec = results_df['Soft Precision'].mean()
-    avg_inclusion = results_df['Inclusion Score'].mean()
+    # Calculate Metrics (one pass per column)
+    metric_columns = ['Score', 'Hallucination', 'Time (s)', 'Confidence', 'Factual Accuracy', 'Final Trust',
+                      'Precision', 'Recall', 'F1 Score', 'Soft Recall', 'Soft Precision', 'Inclusion Score']
+    stats = results_df.agg({column: 'mean' for column in metric_columns})
+    
+    avg_score = stats['Score']
+    hallucination_rate = stats['Hallucination'] * 100
+    avg_time = stats['Time (s)']
+    
+    # Averages for new metrics
+    avg_conf = stats['Confidence']
+    avg_fact = stats['Factual Accuracy']
+    avg_trust = stats['Final Trust']
+    avg_prec = stats['Precision']
+    avg_rec = stats['Recall']
+    avg_f1 = stats['F1 Score']
+    avg_soft_rec = stats['Soft Recall']
+    avg_soft_prec = stats['Soft Precision']
+    avg_inclusion = stats['Inclusion Score']
     
     print("\n" + "=" * 60)
     print("BENCHMARK COMPLETION SUMMARY")
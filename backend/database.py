@@ -1,58 +1,82 @@
-import sqlite3
-import json
+import aiosqlite
+import orjson
+import msgpack
 import uuid
 from datetime import datetime
 from typing import List, Dict, Optional
+from aiosqlitepool import SQLiteConnectionPool
 
 DB_PATH = "chat_history.db"
 
-def init_db():
+async def _factory() -> aiosqlite.Connection:
+    """Open a pooled connection with the pragmas every connection should share"""
+    conn = await aiosqlite.connect(DB_PATH)
+    conn.row_factory = aiosqlite.Row
+    await conn.execute("PRAGMA journal_mode=WAL")
+    await conn.execute("PRAGMA synchronous=NORMAL")
+    await conn.execute("PRAGMA cache_size=-20000")
+    return conn
+
+# Long-lived connections keep SQLite's page cache hot between requests
+pool = SQLiteConnectionPool(_factory, pool_size=8)
+
+async def init_db():
     """Initialize the SQLite database with required tables"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Create chats table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS chats (
-            id TEXT PRIMARY KEY,
-            title TEXT,
-            created_at TIMESTAMP,
-            domain TEXT DEFAULT 'general'
-        )
-    ''')
-
-    # Check if domain column exists (migration for existing db)
-    c.execute("PRAGMA table_info(chats)")
-    columns = [info[1] for info in c.fetchall()]
-    if 'domain' not in columns:
-        print("Migrating database: Adding domain column to chats table")
-        c.execute("ALTER TABLE chats ADD COLUMN domain TEXT DEFAULT 'general'")
-    
-    # Create messages table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS messages (
-            id TEXT PRIMARY KEY,
-            chat_id TEXT,
-            role TEXT,
-            content TEXT,
-            metadata TEXT,
-            timestamp TIMESTAMP,
-            FOREIGN KEY (chat_id) REFERENCES chats (id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-def get_all_chats() -> List[Dict]:
+    async with pool.connection() as conn:
+        # Create chats table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS chats (
+                id TEXT PRIMARY KEY,
+                title TEXT,
+                created_at TIMESTAMP,
+                domain TEXT DEFAULT 'general'
+            )
+        ''')
+
+        # Check if domain column exists (migration for existing db)
+        cursor = await conn.execute("PRAGMA table_info(chats)")
+        columns = [info[1] for info in await cursor.fetchall()]
+        if 'domain' not in columns:
+            print("Migrating database: Adding domain column to chats table")
+            await conn.execute("ALTER TABLE chats ADD COLUMN domain TEXT DEFAULT 'general'")
+
+        # Create messages table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS messages (
+                id TEXT PRIMARY KEY,
+                chat_id TEXT,
+                role TEXT,
+                content TEXT,
+                metadata TEXT,
+                timestamp TIMESTAMP,
+                metadata_mp BLOB,
+                FOREIGN KEY (chat_id) REFERENCES chats (id)
+            )
+        ''')
+
+        # Metadata is stored as msgpack; the TEXT column is kept for rows written before the migration
+        cursor = await conn.execute("PRAGMA table_info(messages)")
+        columns = [info[1] for info in await cursor.fetchall()]
+        if 'metadata_mp' not in columns:
+            print("Migrating database: Adding metadata_mp column to messages table")
+            await conn.execute("ALTER TABLE messages ADD COLUMN metadata_mp BLOB")
+
+        # Indexes for get_chat_messages and get_all_chats ordering
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_chat_ts ON messages(chat_id, timestamp)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_chats_created ON chats(created_at DESC)")
+
+        await conn.commit()
+
+async def close_db():
+    """Close all pooled connections"""
+    await pool.close()
+
+async def get_all_chats() -> List[Dict]:
     """Get all chat sessions ordered by date"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    
-    c.execute('SELECT * FROM chats ORDER BY created_at DESC')
-    rows = c.fetchall()
-    
+    async with pool.connection() as conn:
+        cursor = await conn.execute('SELECT * FROM chats ORDER BY created_at DESC')
+        rows = await cursor.fetchall()
+
     chats = []
     for row in rows:
         chats.append({
@@ -61,85 +85,97 @@ def get_all_chats() -> List[Dict]:
             "created_at": row["created_at"],
             "domain": row["domain"] if "domain" in row.keys() else "general"
         })
-    
-    conn.close()
+
     return chats
 
-def get_chat_messages(chat_id: str) -> List[Dict]:
+async def get_chat_messages(chat_id: str) -> List[Dict]:
     """Get all messages for a specific chat"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    
-    c.execute('SELECT * FROM messages WHERE chat_id = ? ORDER BY timestamp ASC', (chat_id,))
-    rows = c.fetchall()
-    
+    async with pool.connection() as conn:
+        cursor = await conn.execute('SELECT * FROM messages WHERE chat_id = ? ORDER BY timestamp ASC', (chat_id,))
+        rows = await cursor.fetchall()
+
     messages = []
     for row in rows:
+        if row["metadata_mp"]:
+            metadata = msgpack.unpackb(row["metadata_mp"], raw=False)
+        elif row["metadata"]:
+            metadata = orjson.loads(row["metadata"])
+        else:
+            metadata = None
+
         messages.append({
             "id": row["id"],
             "role": row["role"],
             "content": row["content"],
-            "metadata": json.loads(row["metadata"]) if row["metadata"] else None,
+            "metadata": metadata,
             "timestamp": row["timestamp"]
         })
-    
-    conn.close()
+
     return messages
 
-def create_chat(title: str = None, domain: str = "general") -> str:
+async def create_chat(title: str = None, domain: str = "general") -> str:
     """Create a new chat session"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
     chat_id = str(uuid.uuid4())
     created_at = datetime.now().isoformat()
-    
+
     if not title:
         title = "New Chat"
-        
-    c.execute('INSERT INTO chats (id, title, created_at, domain) VALUES (?, ?, ?, ?)',
-              (chat_id, title, created_at, domain))
-    
-    conn.commit()
-    conn.close()
+
+    async with pool.connection() as conn:
+        await conn.execute('INSERT INTO chats (id, title, created_at, domain) VALUES (?, ?, ?, ?)',
+                           (chat_id, title, created_at, domain))
+        await conn.commit()
+
     return chat_id
 
-def add_message(chat_id: str, role: str, content: str, metadata: Dict = None):
-    """Add a message to a chat"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
+async def create_chat_with_message(title: str, domain: str, role: str, content: str,
+                                   metadata: Dict = None, timestamp: Optional[str] = None) -> str:
+    """Create a new chat and add its first message in a single transaction"""
+    chat_id = str(uuid.uuid4())
     msg_id = str(uuid.uuid4())
-    timestamp = datetime.now().isoformat()
-    metadata_json = json.dumps(metadata) if metadata else None
-    
-    c.execute('''
-        INSERT INTO messages (id, chat_id, role, content, metadata, timestamp)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (msg_id, chat_id, role, content, metadata_json, timestamp))
-    
-    conn.commit()
-    conn.close()
-
-def update_chat_title(chat_id: str, title: str):
+    timestamp = timestamp or datetime.now().isoformat()
+    metadata_blob = msgpack.packb(metadata, use_bin_type=True) if metadata else None
+
+    if not title:
+        title = "New Chat"
+
+    async with pool.connection() as conn:
+        await conn.execute('INSERT INTO chats (id, title, created_at, domain) VALUES (?, ?, ?, ?)',
+                           (chat_id, title, timestamp, domain))
+        await conn.execute('''
+            INSERT INTO messages (id, chat_id, role, content, metadata_mp, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (msg_id, chat_id, role, content, metadata_blob, timestamp))
+        await conn.commit()
+
+    return chat_id
+
+async def add_message(chat_id: str, role: str, content: str, metadata: Dict = None, timestamp: Optional[str] = None):
+    """Add a message to a chat (callers may pass a precomputed ISO timestamp)"""
+    msg_id = str(uuid.uuid4())
+    timestamp = timestamp or datetime.now().isoformat()
+    metadata_blob = msgpack.packb(metadata, use_bin_type=True) if metadata else None
+
+    async with pool.connection() as conn:
+        await conn.execute('''
+            INSERT INTO messages (id, chat_id, role, content, metadata_mp, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (msg_id, chat_id, role, content, metadata_blob, timestamp))
+        await conn.commit()
+
+async def update_chat_title(chat_id: str, title: str):
     """Update the title of a chat"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('UPDATE chats SET title = ? WHERE id = ?', (title, chat_id))
-    conn.commit()
-    conn.close()
+    async with pool.connection() as conn:
+        await conn.execute('UPDATE chats SET title = ? WHERE id = ?', (title, chat_id))
+        await conn.commit()
 
-def delete_chat(chat_id: str):
+async def delete_chat(chat_id: str):
     """Delete a chat and all its messages"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Delete messages first (manual cascade)
-    c.execute('DELETE FROM messages WHERE chat_id = ?', (chat_id,))
-    
-    # Delete the chat
-    c.execute('DELETE FROM chats WHERE id = ?', (chat_id,))
-    
-    conn.commit()
-    conn.close()
+    async with pool.connection() as conn:
+        # Delete messages first (manual cascade)
+        await conn.execute('DELETE FROM messages WHERE chat_id = ?', (chat_id,))
+
+        # Delete the chat
+        await conn.execute('DELETE FROM chats WHERE id = ?', (chat_id,))
+
+        await conn.commit()
@@ -0,0 +1,246 @@
+"""
+Response Cache for the Multi-LLM Pipeline
+=========================================
+Two-tier cache in front of the full generator/verifier/comparer pipeline:
+an exact layer keyed by the SHA256 of the normalized query, and an optional
+semantic layer that matches paraphrased queries by embedding similarity.
+The same class also backs the verifier cache, which can persist to disk.
+"""
+
+import os
+import time
+import atexit
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import msgpack
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+def semantic_cache_enabled() -> bool:
+    """Whether SEMANTIC_CACHE_ENABLED is set.
+
+    Read on first use rather than at import, so a value from .env (loaded by
+    llm_system.load_environment) is seen.
+    """
+    return os.getenv("SEMANTIC_CACHE_ENABLED", "").lower() in ("1", "true", "yes")
+
+# One encoder for every cache in the process, so enabling the semantic layer loads the model once
+_encoder = None
+_encoder_lock = threading.Lock()
+
+def get_encoder():
+    """Load the shared sentence-transformers model on first use, or None if it is not installed."""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                logger.warning("sentence-transformers not installed; semantic cache disabled")
+                return None
+            _encoder = SentenceTransformer(SEMANTIC_MODEL_NAME)
+        return _encoder
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivial variations share a key."""
+    return " ".join(query.lower().split())
+
+class LLMCache:
+    """LRU + TTL cache with an optional embedding-similarity lookup."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 4 * 60 * 60,
+                 semantic_threshold: float = 0.95, semantic_enabled: Optional[bool] = None,
+                 persist_path: Optional[str] = None, persist_interval: float = 30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        # None means follow SEMANTIC_CACHE_ENABLED, resolved on first use
+        self.semantic_enabled = semantic_enabled
+        self.persist_path = persist_path
+        self.persist_interval = persist_interval
+
+        # key -> (embedding, response, expiry); embedding is None when the semantic layer is off
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+        # Snapshots are numbered so a slow write never replaces a newer one on disk
+        self._version = 0
+        self._written_version = 0
+        self._write_lock = threading.Lock()
+        # Writes are batched: at most one per persist_interval, with the rest flushed at exit
+        self._dirty = False
+        self._last_persist = 0.0
+        if persist_path:
+            self._load()
+            atexit.register(self.flush)
+
+    def _load(self):
+        """Restore unexpired entries saved by a previous run."""
+        try:
+            with open(self.persist_path, "rb") as f:
+                records = msgpack.unpackb(f.read(), raw=False)
+        except (OSError, ValueError, msgpack.UnpackException):
+            return
+        now = time.time()
+        for key, embedding, response, expiry in records:
+            if expiry > now:
+                vector = np.frombuffer(embedding, dtype=np.float32) if embedding is not None else None
+                self._entries[key] = (vector, response, expiry)
+
+    def _snapshot(self) -> Tuple[int, List[tuple]]:
+        """Copy the entries into serializable records (cheap; done on the caller's thread)."""
+        self._version += 1
+        self._dirty = False
+        records = [
+            (key, embedding.astype(np.float32).tobytes() if embedding is not None else None, response, expiry)
+            for key, (embedding, response, expiry) in self._entries.items()
+        ]
+        return self._version, records
+
+    def _write(self, version: int, records: List[tuple]):
+        """Atomically replace the cache file with a snapshot.
+
+        Each write goes through its own temp file, so concurrent writers (threads or
+        uvicorn workers) never clobber each other's partial output. Across workers the
+        last complete snapshot wins; each worker keeps its own in-memory view.
+        """
+        with self._write_lock:
+            if version <= self._written_version:
+                return
+            directory = os.path.dirname(os.path.abspath(self.persist_path))
+            tmp_path = None
+            try:
+                with tempfile.NamedTemporaryFile(
+                    "wb", dir=directory, prefix=os.path.basename(self.persist_path) + ".", suffix=".tmp", delete=False
+                ) as f:
+                    tmp_path = f.name
+                    f.write(msgpack.packb(records, use_bin_type=True))
+                os.replace(tmp_path, self.persist_path)
+                self._written_version = version
+            except OSError as e:
+                logger.warning("Could not persist cache to %s: %s", self.persist_path, e)
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _key(self, query: str, domain: str) -> str:
+        return hashlib.sha256(f"{domain}\x00{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+    def _semantic_on(self) -> bool:
+        if self.semantic_enabled is None:
+            self.semantic_enabled = semantic_cache_enabled()
+        return self.semantic_enabled
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        """Embed a query (CPU-bound; async callers run this in a worker thread)."""
+        if not self._semantic_on():
+            return None
+        encoder = get_encoder()
+        if encoder is None:
+            self.semantic_enabled = False
+            return None
+        embedding = encoder.encode(normalize_query(query))
+        return embedding / np.linalg.norm(embedding)
+
+    async def _aembed(self, query: str) -> Optional[np.ndarray]:
+        if not self._semantic_on():
+            return None
+        return await asyncio.to_thread(self._embed, query)
+
+    def warm_up(self):
+        """Load the embedding model ahead of the first request (no-op when the semantic layer is off)."""
+        self._embed("warm up")
+
+    def _evict_expired(self):
+        now = time.time()
+        for key in [k for k, (_, _, expiry) in self._entries.items() if expiry <= now]:
+            del self._entries[key]
+
+    def _get_exact(self, query: str, domain: str) -> Optional[Dict[str, Any]]:
+        self._evict_expired()
+        key = self._key(query, domain)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key][1]
+        return None
+
+    def get(self, query: str, domain: str = "general") -> Optional[Dict[str, Any]]:
+        """Return a cached response for the query, or None on a miss."""
+        hit = self._get_exact(query, domain)
+        if hit is not None:
+            return hit
+        return self._get_nearest(self._embed(query), domain)
+
+    async def aget(self, query: str, domain: str = "general") -> Optional[Dict[str, Any]]:
+        """Async variant of get that embeds the query off the event loop."""
+        hit = self._get_exact(query, domain)
+        if hit is not None:
+            return hit
+        return self._get_nearest(await self._aembed(query), domain)
+
+    def _get_nearest(self, q: Optional[np.ndarray], domain: str) -> Optional[Dict[str, Any]]:
+        if q is None:
+            return None
+
+        candidates = [(k, e) for k, (e, r, _) in self._entries.items()
+                      if e is not None and r.get("domain") == domain]
+        if not candidates:
+            return None
+
+        mat = np.stack([e for _, e in candidates])
+        scores = np.dot(mat, q)
+        best = int(np.argmax(scores))
+        if scores[best] < self.semantic_threshold:
+            return None
+
+        best_key = candidates[best][0]
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][1]
+
+    def _store(self, query: str, embedding: Optional[np.ndarray], response: Dict[str, Any], domain: str):
+        key = self._key(query, domain)
+        self._entries[key] = (embedding, response, time.time() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _persist_due(self) -> bool:
+        """Mark the cache dirty and say whether enough time has passed to write it now."""
+        if not self.persist_path:
+            return False
+        self._dirty = True
+        now = time.monotonic()
+        if now - self._last_persist < self.persist_interval:
+            return False
+        self._last_persist = now
+        return True
+
+    def set(self, query: str, response: Dict[str, Any], domain: str = "general"):
+        """Store a response for the query, evicting the least recently used entry when full."""
+        self._store(query, self._embed(query), response, domain)
+        if self._persist_due():
+            self._write(*self._snapshot())
+
+    async def aset(self, query: str, response: Dict[str, Any], domain: str = "general"):
+        """Async variant of set; embedding and the disk write run in worker threads."""
+        self._store(query, await self._aembed(query), response, domain)
+        if self._persist_due():
+            await asyncio.to_thread(self._write, *self._snapshot())
+
+    def flush(self):
+        """Write any entries not yet persisted (runs at exit)."""
+        if self.persist_path and self._dirty:
+            self._write(*self._snapshot())
+
+llm_cache = LLMCache()
+
+# Search context + verifier answer per query, so paraphrased repeats skip Tavily and the verifier
+VERIFIER_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".verifier_cache.msgpack")
+verifier_cache = LLMCache(semantic_threshold=0.92, persist_path=VERIFIER_CACHE_PATH)
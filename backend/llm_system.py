@@ -4,29 +4,58 @@ Modified for FastAPI Backend Integration
 =========================================================
 """
 
+import io
 import os
+import re
+import functools
+import itertools
+import threading
+import contextlib
+import atexit
+import weakref
+import uuid
+import copy
 import time
-from typing import Dict, Any, List
+import asyncio
+import hashlib
+import httpx
+import orjson
+from collections import deque
+from difflib import SequenceMatcher
+from typing import Deque, Dict, Any, List, Optional, Tuple
+from cachetools import TTLCache
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough, RunnableParallel, RunnableLambda
-from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_core.runnables import RunnablePassthrough, RunnableParallel, RunnableLambda, RunnableBranch
+from langchain_community.cache import SQLiteCache, RedisCache
+from langchain_core.globals import set_llm_cache
 from langchain_openai import ChatOpenAI
+from openai import RateLimitError
 import dotenv
-
-# Load environment variables
-dotenv.load_dotenv()
+from llm_cache import verifier_cache
 
 # ===========================
 # CONFIGURATION SECTION
 # ===========================
 
-# Set up API keys from environment variables
-tavily_api_key = os.getenv("TAVILY_API_KEY")
-openrouter_api_key1 = os.getenv("OPENROUTER_API_KEY1")
-openrouter_api_key2 = os.getenv("OPENROUTER_API_KEY2")
-openrouter_api_key3 = os.getenv("OPENROUTER_API_KEY3")
-openrouter_api_key4 = os.getenv("OPENROUTER_API_KEY4")
+# Models, templates and chains below are built on first use by cached getters,
+# so importing this module (e.g. just for format_search_results) stays cheap.
+# Tests can reset any of them with `<getter>.cache_clear()`.
+
+@functools.cache
+def load_environment():
+    """Load environment variables from .env once per process tree."""
+    # Child processes inherit the sentinel, so forked workers skip the .env parse
+    if not os.environ.get("_TS_ENV_LOADED"):
+        dotenv.load_dotenv()
+        os.environ["_TS_ENV_LOADED"] = "1"
+
+def get_api_key(name: str) -> Optional[str]:
+    """Read an API key after making sure .env has been loaded."""
+    load_environment()
+    return os.getenv(name)
+
 # ===========================
 # DOMAIN CONFIGURATION
 # ===========================
@@ -70,17 +99,331 @@ DOMAINS = {
     }
 }
 
+# Verifier and comparer preambles are built once per domain at import
+for _config in DOMAINS.values():
+    _desc = _config["description"].lower()
+    _config["verifier_system_prompt"] = (
+        f"You are a factual assistant specialized in {_desc}. Answer the following user query based ONLY "
+        "on the provided search results context. Do not use any of your internal knowledge."
+    )
+    _config["verifier_scored_system_prompt"] = (
+        f"You are a factual assistant specialized in {_desc}. Answer the following user query based ONLY "
+        "on the provided search results context.\n\n"
+        "IMPORTANT: You MUST end your response with:\nFACTUAL_ACCURACY_SCORE: [0-100]"
+    )
+    _config["comparer_system_prompt"] = (
+        f"You are a meticulous fact-checking and synthesis agent specialized in {_desc}. Your goal is to produce "
+        "the most accurate and reliable answer to the user's query by comparing two different AI-generated answers."
+    )
+del _config, _desc
+
 def get_domain_config(domain: str = "general") -> Dict[str, Any]:
     """Get domain configuration by domain key."""
     return DOMAINS.get(domain, DOMAINS["general"])
 
+def _per_loop(factory):
+    """Cache factory(*args) per running event loop.
+
+    Semaphores, async Redis clients and async connection pools are bound to the
+    loop they first run on, and the sync wrappers below run each call on a fresh
+    loop via asyncio.run, so these must never be shared across loops.
+    """
+    instances = weakref.WeakKeyDictionary()
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def get(*args):
+        loop = asyncio.get_running_loop()
+        with lock:
+            per_loop = instances.setdefault(loop, {})
+            if args not in per_loop:
+                per_loop[args] = factory(*args)
+            return per_loop[args]
+
+    get.instances = instances
+    return get
+
+# ===========================
+# SHARED REDIS CACHE (OPTIONAL)
+# ===========================
+
+# With REDIS_URL set, search results and LLM responses live in Redis so every
+# worker process shares them; without it (or if Redis is unreachable) the
+# per-process memory/disk caches below are used on their own.
+REDIS_SEARCH_PREFIX = "tavily:"
+REDIS_LLM_TTL = 24 * 60 * 60
+REDIS_LOCK_TTL = 30
+
+@functools.cache
+def get_redis():
+    """Get the shared sync Redis client, or None if Redis is not configured or reachable."""
+    load_environment()
+    url = os.getenv("REDIS_URL")
+    if not url:
+        return None
+    try:
+        import redis
+        client = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+        client.ping()
+    except ImportError:
+        print("redis not installed; shared cache disabled")
+        return None
+    except Exception as e:
+        print(f"Redis unreachable ({e}); using local caches only")
+        return None
+    return client
+
+@_per_loop
+def get_async_redis():
+    """Get the running loop's asyncio Redis client (only when the sync client connected)."""
+    if get_redis() is None:
+        return None
+    import redis.asyncio
+    return redis.asyncio.Redis.from_url(os.getenv("REDIS_URL"), socket_connect_timeout=1, socket_timeout=1)
+
+async def _aclose_loop_redis():
+    """Close the running loop's Redis client, if it created one."""
+    for client in get_async_redis.instances.pop(asyncio.get_running_loop(), {}).values():
+        if client is not None:
+            await client.aclose()
+
 # ===========================
 # MODEL INITIALIZATION
 # ===========================
 
+# Persistent prompt/response cache shared by all models. LangChain keys entries
+# on the fully rendered messages plus the model parameters, so changing a
+# domain's system prompt or a model setting naturally misses the cache.
+LLM_CACHE_PATH = ".llm_cache.db"
+
+class _CountingCacheMixin:
+    """Count hits and misses on a LangChain cache's lookups."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, prompt: str, llm_string: str):
+        result = super().lookup(prompt, llm_string)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+class CountingSQLiteCache(_CountingCacheMixin, SQLiteCache):
+    """SQLiteCache that counts hits and misses."""
+
+class CountingRedisCache(_CountingCacheMixin, RedisCache):
+    """RedisCache that counts hits and misses."""
+
+@functools.cache
+def _init_llm_cache():
+    redis_client = get_redis()
+    if redis_client is not None:
+        cache = CountingRedisCache(redis_=redis_client, ttl=REDIS_LLM_TTL)
+    else:
+        cache = CountingSQLiteCache(database_path=LLM_CACHE_PATH)
+    set_llm_cache(cache)
+    return cache
+
+def get_llm_cache_stats() -> Dict[str, int]:
+    """Get hit/miss counters for the persistent LLM cache."""
+    cache = _init_llm_cache()
+    return {"hits": cache.hits, "misses": cache.misses}
+
 # Base URL for OpenRouter
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
+# Model IDs per tier; pick one with TS_MODEL_TIER instead of editing the constructors
+DEFAULT_MODEL_TIER = "free"
+MODEL_IDS = {
+    "free": {
+        "generator": "llama3.2:latest",
+        "verifier": "openrouter/free",
+        "comparer": "nvidia/nemotron-nano-9b-v2:free",
+    },
+    "free-70b": {
+        "generator": "llama3.2:latest",
+        "verifier": "meta-llama/llama-3.3-70b-instruct:free",
+        "comparer": "meta-llama/llama-3.3-70b-instruct:free",
+    },
+    "free-8b": {
+        "generator": "llama3.2:latest",
+        "verifier": "meta-llama/llama-3.1-8b-instruct:free",
+        "comparer": "meta-llama/llama-3.1-8b-instruct:free",
+    },
+}
+
+@functools.cache
+def get_model_ids() -> Dict[str, str]:
+    """Get the model IDs for the configured TS_MODEL_TIER."""
+    load_environment()
+    tier = os.getenv("TS_MODEL_TIER", DEFAULT_MODEL_TIER)
+    if tier not in MODEL_IDS:
+        print(f"Unknown TS_MODEL_TIER {tier!r} (expected one of {', '.join(MODEL_IDS)}); using {DEFAULT_MODEL_TIER!r}")
+        tier = DEFAULT_MODEL_TIER
+    return MODEL_IDS[tier]
+
+# Shared connection pools so every model call reuses keep-alive connections
+# instead of paying a fresh TCP + TLS handshake. HTTP/2 lets the parallel
+# verifier and comparer requests to openrouter.ai share one connection.
+# The clients are created on first use, so importing this module opens nothing.
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60)
+
+@_per_loop
+def _get_loop_transport() -> httpx.AsyncHTTPTransport:
+    return httpx.AsyncHTTPTransport(http2=True, limits=HTTP_LIMITS)
+
+async def _aclose_loop_transport():
+    """Close the running loop's connection pool, if it opened one."""
+    transports = _get_loop_transport.instances.pop(asyncio.get_running_loop(), {})
+    for transport in transports.values():
+        await transport.aclose()
+
+class _PerLoopAsyncTransport(httpx.AsyncBaseTransport):
+    """Send each request through the running loop's own connection pool.
+
+    The models are built once and reused, so their async client outlives any
+    one event loop; the pool underneath it must not.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await _get_loop_transport().handle_async_request(request)
+
+    async def aclose(self):
+        await _aclose_loop_transport()
+
+@functools.cache
+def get_http_client() -> httpx.Client:
+    return httpx.Client(http2=True, limits=HTTP_LIMITS)
+
+@functools.cache
+def get_http_async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=_PerLoopAsyncTransport())
+
+async def aclose_http_clients():
+    """Close whichever shared clients were created (app shutdown)."""
+    if get_http_async_client.cache_info().currsize:
+        await get_http_async_client().aclose()
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+
+def _close_http_clients():
+    try:
+        asyncio.run(aclose_http_clients())
+    except RuntimeError:
+        pass
+
+atexit.register(_close_http_clients)
+
+def _run_sync(coro):
+    """Run a coroutine on a fresh loop, closing that loop's connections afterwards."""
+    async def run():
+        try:
+            return await coro
+        finally:
+            await _aclose_loop_transport()
+            await _aclose_loop_redis()
+    return asyncio.run(run())
+
+# OpenRouter's free tier rate-limits aggressively; capping in-flight requests
+# per key keeps bursts from concurrent requests and parallel fan-out below the limit
+# instead of burning time in max_retries backoff. Cache hits never take a slot.
+# One semaphore per key per event loop: an asyncio.Semaphore binds to the loop
+# that first waits on it.
+@_per_loop
+def get_openrouter_semaphore(api_key: str = "") -> asyncio.Semaphore:
+    load_environment()
+    return asyncio.Semaphore(int(os.getenv("OPENROUTER_CONCURRENCY", "8")))
+
+@functools.cache
+def get_openrouter_keys() -> List[Optional[str]]:
+    """Get every configured OpenRouter key (or [None] if there are none).
+
+    Keys come from OPENROUTER_API_KEY1..4 plus the comma-separated OPENROUTER_API_KEYS.
+    """
+    keys = [get_api_key(f"OPENROUTER_API_KEY{i}") for i in range(1, 5)]
+    keys += (get_api_key("OPENROUTER_API_KEYS") or "").split(",")
+    return list(dict.fromkeys(key.strip() for key in keys if key and key.strip())) or [None]
+
+# A key that returns 429 is skipped for this long
+RATE_LIMIT_COOLDOWN_SECS = 60
+
+class OpenRouterKeyPool:
+    """Spread OpenRouter calls across keys, preferring the least busy key not cooling down after a 429."""
+
+    def __init__(self, keys: List[Optional[str]]):
+        self.keys = keys
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._in_flight = {key: 0 for key in keys}
+        self._cooldown_until = {key: 0.0 for key in keys}
+        self.stats = {key: {"requests": 0, "rate_limited": 0} for key in keys}
+
+    def ranked(self) -> List[Optional[str]]:
+        """Keys in preference order: available before cooling, then by in-flight count, ties round-robin."""
+        with self._lock:
+            now = time.monotonic()
+            start = next(self._turn) % len(self.keys)
+            rotated = self.keys[start:] + self.keys[:start]
+            return sorted(rotated, key=lambda key: (self._cooldown_until[key] > now, self._in_flight[key]))
+
+    @contextlib.contextmanager
+    def track(self, key: Optional[str]):
+        """Count a request against a key, starting its cooldown if it is rate limited."""
+        with self._lock:
+            self._in_flight[key] += 1
+            self.stats[key]["requests"] += 1
+        try:
+            yield
+        except RateLimitError:
+            with self._lock:
+                self._cooldown_until[key] = time.monotonic() + RATE_LIMIT_COOLDOWN_SECS
+                self.stats[key]["rate_limited"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight[key] -= 1
+
+@functools.cache
+def get_openrouter_key_pool() -> OpenRouterKeyPool:
+    return OpenRouterKeyPool(get_openrouter_keys())
+
+class RateLimitedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI that reports to the key pool and shares its key's OpenRouter concurrency cap."""
+
+    def _api_key(self) -> Optional[str]:
+        return self.openai_api_key.get_secret_value() if self.openai_api_key else None
+
+    def _generate(self, *args, **kwargs):
+        with get_openrouter_key_pool().track(self._api_key()):
+            return super()._generate(*args, **kwargs)
+
+    async def _agenerate(self, *args, **kwargs):
+        with get_openrouter_key_pool().track(self._api_key()):
+            async with get_openrouter_semaphore(self._api_key() or ""):
+                return await super()._agenerate(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        with get_openrouter_key_pool().track(self._api_key()):
+            async with get_openrouter_semaphore(self._api_key() or ""):
+                async for chunk in super()._astream(*args, **kwargs):
+                    yield chunk
+
+def _pooled(clients: Dict[Optional[str], ChatOpenAI]):
+    """Route each call to the pool's preferred key, failing over to the others on a 429."""
+    if len(clients) == 1:
+        return next(iter(clients.values()))
+
+    def pick(_):
+        primary, *fallbacks = [clients[key] for key in get_openrouter_key_pool().ranked()]
+        return primary.with_fallbacks(fallbacks, exceptions_to_handle=(RateLimitError,))
+
+    # A RunnableLambda that returns a runnable delegates invoke/stream/batch to it
+    return RunnableLambda(pick)
+
 # Generator Model - Creative but potentially hallucinatory (Local Ollama)
 
 # using openrouter free model
@@ -88,7 +431,7 @@ OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 #     model="openrouter/free",
 #     temperature=0.7,
 #     openai_api_base=OPENROUTER_BASE_URL,
-#     openai_api_key=openrouter_api_key1,
+#     openai_api_key=get_api_key("OPENROUTER_API_KEY1"),
 #     default_headers={
 #         "HTTP-Referer": "http://localhost:3000",
 #         "X-Title": "Multi-LLM Hallucination Reduction System"
@@ -96,51 +439,81 @@ OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 # ) 
 
 # Using llama3.2 - faster and better for creative generation than deepseek-r1:1.5b
-generator_llm = ChatOpenAI(
-    model="llama3.2:latest",
-    temperature=0.7,
-    max_tokens=500,
-    openai_api_base="http://localhost:11434/v1",
-    openai_api_key="ollama",  # Ollama doesn't require a real key
-)
+@functools.cache
+def get_generator_llm():
+    _init_llm_cache()
+    return ChatOpenAI(
+        model=get_model_ids()["generator"],
+        temperature=0.7,
+        max_tokens=500,
+        cache=False,  # Sampled at 0.7, so a cached answer would pin one draw forever
+        openai_api_base="http://localhost:11434/v1",
+        openai_api_key="ollama",  # Ollama doesn't require a real key
+        http_client=get_http_client(),
+        http_async_client=get_http_async_client(),
+    )
 
 # Verifier Model - Grounded and factual (using fast llama-3.1-8b instead of slow deepseek-r1)
-verifier_llm = ChatOpenAI(
-    model="openrouter/free",
-    temperature=0.3,
-    max_retries=5,
-    openai_api_base=OPENROUTER_BASE_URL,
-    openai_api_key=openrouter_api_key4,
-    default_headers={
-        "HTTP-Referer": "http://localhost:3000",
-        "X-Title": "Multi-LLM Hallucination Reduction System"
-    }
-)
+@functools.cache
+def get_verifier_llm():
+    _init_llm_cache()
+    keys = get_openrouter_keys()
+    return _pooled({
+        api_key: RateLimitedChatOpenAI(
+            model=get_model_ids()["verifier"],
+            temperature=0.3,
+            max_tokens=512,  # Comparer only needs the facts; bound decode time on this branch
+            max_retries=5 if len(keys) == 1 else 1,  # With several keys, fail over instead of backing off
+            openai_api_base=OPENROUTER_BASE_URL,
+            openai_api_key=api_key,
+            default_headers={
+                "HTTP-Referer": "http://localhost:3000",
+                "X-Title": "Multi-LLM Hallucination Reduction System"
+            },
+            http_client=get_http_client(),
+            http_async_client=get_http_async_client(),
+        )
+        for api_key in keys
+    })
 
 # Comparer Model - Critical reasoner and synthesizer
-comparer_llm = ChatOpenAI(
-    model="nvidia/nemotron-nano-9b-v2:free",
-    temperature=0.4,
-    max_retries=5,
-    openai_api_base=OPENROUTER_BASE_URL,
-    openai_api_key=openrouter_api_key4,
-    default_headers={
-        "HTTP-Referer": "http://localhost:3000",
-        "X-Title": "Multi-LLM Hallucination Reduction System"
-    }
-)
+@functools.cache
+def get_comparer_llm():
+    _init_llm_cache()
+    keys = get_openrouter_keys()
+    return _pooled({
+        api_key: RateLimitedChatOpenAI(
+            model=get_model_ids()["comparer"],
+            temperature=0.4,
+            max_tokens=500,  # ~300-word answer plus the score block
+            max_retries=5 if len(keys) == 1 else 1,  # With several keys, fail over instead of backing off
+            openai_api_base=OPENROUTER_BASE_URL,
+            openai_api_key=api_key,
+            default_headers={
+                "HTTP-Referer": "http://localhost:3000",
+                "X-Title": "Multi-LLM Hallucination Reduction System"
+            },
+            http_client=get_http_client(),
+            http_async_client=get_http_async_client(),
+        )
+        for api_key in keys
+    })
 
 # ===========================
 # SEARCH TOOL INITIALIZATION
 # ===========================
 
-search_tool = TavilySearchResults(
-    api_key=tavily_api_key,
-    max_results=5,
-    search_depth="advanced",
-    include_answer=True,
-    include_raw_content=False,
-)
+@functools.cache
+def get_search_tool():
+    # Imported here so startup doesn't pay for the Tavily integration until the first search
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    return TavilySearchResults(
+        api_key=get_api_key("TAVILY_API_KEY"),
+        max_results=5,
+        search_depth="advanced",
+        include_answer=True,
+        include_raw_content=False,
+    )
 
 # ===========================
 # PROMPT TEMPLATES
@@ -148,7 +521,7 @@ search_tool = TavilySearchResults(
 
 def create_generator_prompt_template(system_prompt: str = "You are a helpful AI assistant. Please answer the following query to the best of your ability."):
     return ChatPromptTemplate.from_template(
-        f"""{system_prompt}
+        f"""{system_prompt} Respond in at most 300 words.
 
 Query: {{query}}
 
@@ -174,6 +547,7 @@ def create_verifier_prompt_template(system_prompt: str = "You are a factual veri
     3.  **Scientific Consensus**: Is the claim supported by major scientific bodies? (e.g., "Nuclear power safety", "Global warming")
     4.  **Advertising vs. Fact**: Explicitly check if the claim is a slogan or marketing myth (e.g., "Meow Mix", "Diamonds are rare").
     5.  **Physical Implications**: For biological/physical questions, check all implications (e.g., if a shark stops swimming, does it float or sink?).
+    6.  Respond in at most 300 words.
 
     OUTPUT FORMAT:
     -   **Fact Check**: [Statement from Generator] -> [Verified/Debunked/Nuanced] because [Evidence from Context]
@@ -182,11 +556,11 @@ def create_verifier_prompt_template(system_prompt: str = "You are a factual veri
     FACTUAL_ACCURACY_SCORE: [0-100] (0=Completely False, 100=Completely True based on context)
     HALLUCINATION_SCORE: [0-100] (0=No hallucination, 100=Severe hallucination)
     """
-    return PromptTemplate(template=verifier_template, input_variables=["system_prompt", "context", "query", "generator_answer"])
+    return PromptTemplate(template=verifier_template, input_variables=["context", "query", "generator_answer"]).partial(system_prompt=system_prompt)
 
 def create_comparer_prompt_template(system_prompt: str = "You are a meticulous fact-checking and synthesis agent. Your goal is to produce the most accurate and reliable answer to the user's query by comparing two different AI-generated answers."):
     return ChatPromptTemplate.from_template(
-        f"""{system_prompt}
+        f"""{system_prompt} Keep the final answer to at most 300 words so the scores below are not cut off.
 
 Original Query: {{query}}
 
@@ -226,9 +600,17 @@ FINAL_TRUST_SCORE: [0-100] (Overall reliability of this answer)"""
     )
 
 # Default templates for backward compatibility
-generator_prompt_template = create_generator_prompt_template()
-verifier_prompt_template = create_verifier_prompt_template()
-comparer_prompt_template = create_comparer_prompt_template()
+@functools.cache
+def get_generator_prompt_template():
+    return create_generator_prompt_template()
+
+@functools.cache
+def get_verifier_prompt_template():
+    return create_verifier_prompt_template()
+
+@functools.cache
+def get_comparer_prompt_template():
+    return create_comparer_prompt_template()
 
 # ===========================
 # UTILITY FUNCTIONS
@@ -239,87 +621,429 @@ def format_search_results(results: List[Dict]) -> str:
     if not results:
         return "No search results found."
     
-    formatted_results = []
+    # Write every entry into one buffer instead of joining per-result strings
+    buf = io.StringIO()
     for i, result in enumerate(results, 1):
-        content = result.get('content', 'No content available')
-        url = result.get('url', 'No URL')
-        title = result.get('title', 'No title')
-        
-        formatted_results.append(
+        if i > 1:
+            buf.write("\n")
+        buf.write(
             f"Result {i}:\n"
-            f"Title: {title}\n"
-            f"URL: {url}\n"
-            f"Content: {content}\n"
+            f"Title: {result.get('title', 'No title')}\n"
+            f"URL: {result.get('url', 'No URL')}\n"
+            f"Content: {result.get('content', 'No content available')}\n"
         )
     
-    return "\n".join(formatted_results)
+    return buf.getvalue()
 
-def search_and_format(query: str) -> Dict[str, str]:
-    """Search for information and format the results."""
-    if search_tool is None:
-        return {
-            "query": query,
-            "context": "Search functionality is not available. Please verify your Tavily API key."
-        }
+# ===========================
+# SEARCH RESULT CACHE
+# ===========================
+
+# Tavily results are cached in memory and on disk by normalized query so
+# repeated questions skip the search round-trip
+SEARCH_CACHE_TTL = 3600
+SEARCH_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "truesynth", "tavily")
+_search_cache = TTLCache(maxsize=1024, ttl=SEARCH_CACHE_TTL)
+# Per-query single-flight locks, refcounted so a lock is only dropped once nobody holds or awaits it
+_search_locks: Dict[str, asyncio.Lock] = {}
+_search_lock_users: Dict[str, int] = {}
+_search_cache_stats = {"hits": 0, "misses": 0}
+
+def get_search_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss counters for the search cache (memory, Redis and disk layers combined)."""
+    total = _search_cache_stats["hits"] + _search_cache_stats["misses"]
+    return {
+        **_search_cache_stats,
+        "hit_rate": _search_cache_stats["hits"] / total if total else 0.0,
+        "size": len(_search_cache),
+    }
+
+def _search_cache_key(query: str) -> str:
+    return hashlib.sha256(query.strip().lower().encode("utf-8")).hexdigest()
+
+def _get_cached_search(key: str) -> Optional[List[Dict]]:
+    """Look up raw search results in memory, then Redis, then on disk."""
+    if key in _search_cache:
+        return copy.deepcopy(_search_cache[key])
+
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            cached = redis_client.get(REDIS_SEARCH_PREFIX + key)
+        except Exception:
+            cached = None
+        if cached is not None:
+            _search_cache[key] = orjson.loads(cached)
+            return copy.deepcopy(_search_cache[key])
+
+    return _get_disk_search(key)
+
+async def _aget_cached_search(key: str) -> Optional[List[Dict]]:
+    """Async variant of _get_cached_search."""
+    if key in _search_cache:
+        return copy.deepcopy(_search_cache[key])
+
+    redis_client = get_async_redis()
+    if redis_client is not None:
+        try:
+            cached = await redis_client.get(REDIS_SEARCH_PREFIX + key)
+        except Exception:
+            cached = None
+        if cached is not None:
+            _search_cache[key] = orjson.loads(cached)
+            return copy.deepcopy(_search_cache[key])
+
+    return _get_disk_search(key)
+
+def _get_disk_search(key: str) -> Optional[List[Dict]]:
+    path = os.path.join(SEARCH_CACHE_DIR, f"{key}.json")
+    try:
+        if time.time() - os.path.getmtime(path) > SEARCH_CACHE_TTL:
+            return None
+        with open(path, "rb") as f:
+            results = orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+    _search_cache[key] = results
+    return copy.deepcopy(results)
+
+def _store_search(key: str, results: List[Dict]):
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            redis_client.set(REDIS_SEARCH_PREFIX + key, orjson.dumps(results), ex=SEARCH_CACHE_TTL)
+        except Exception:
+            pass
+    _store_local_search(key, results)
+
+async def _astore_search(key: str, results: List[Dict]):
+    """Async variant of _store_search."""
+    redis_client = get_async_redis()
+    if redis_client is not None:
+        try:
+            await redis_client.set(REDIS_SEARCH_PREFIX + key, orjson.dumps(results), ex=SEARCH_CACHE_TTL)
+        except Exception:
+            pass
+    _store_local_search(key, results)
+
+def _store_local_search(key: str, results: List[Dict]):
+    _search_cache[key] = copy.deepcopy(results)
+    try:
+        os.makedirs(SEARCH_CACHE_DIR, exist_ok=True)
+        with open(os.path.join(SEARCH_CACHE_DIR, f"{key}.json"), "wb") as f:
+            f.write(orjson.dumps(results))
+    except OSError:
+        pass
+
+# ===========================
+# SEARCH RETRY / CIRCUIT BREAKER
+# ===========================
+
+# Transient Tavily errors are retried with jittered backoff. If failures keep
+# piling up the breaker opens and uncached searches fail fast for a while
+# instead of each request waiting out the HTTP timeout.
+SEARCH_BREAKER_THRESHOLD = 5
+SEARCH_BREAKER_WINDOW = 60
+SEARCH_BREAKER_COOLDOWN = 30
+_search_failures: Deque[float] = deque()
+_search_breaker_open_until = 0.0
+
+def _check_search_breaker():
+    if time.monotonic() < _search_breaker_open_until:
+        raise RuntimeError("search temporarily disabled after repeated failures")
+
+def _record_search_failure():
+    global _search_breaker_open_until
+    now = time.monotonic()
+    _search_failures.append(now)
+    while _search_failures and now - _search_failures[0] > SEARCH_BREAKER_WINDOW:
+        _search_failures.popleft()
+    if len(_search_failures) > SEARCH_BREAKER_THRESHOLD:
+        _search_breaker_open_until = now + SEARCH_BREAKER_COOLDOWN
+        _search_failures.clear()
+
+# Tavily's sync client raises requests errors; its async client raises aiohttp
+# errors or a bare Exception("Error <status>: <reason>") for non-200 responses
+_TRANSIENT_SEARCH_ERRORS = (TimeoutError, ConnectionError, httpx.TransportError)
+try:
+    import requests
+    _TRANSIENT_SEARCH_ERRORS += (requests.Timeout, requests.ConnectionError)
+except ImportError:
+    pass
+try:
+    import aiohttp
+    _TRANSIENT_SEARCH_ERRORS += (aiohttp.ClientConnectionError,)
+except ImportError:
+    pass
+
+def _search_error_status(exc: BaseException) -> Optional[int]:
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "status", None)
+    if status is None:
+        match = re.match(r"Error (\d{3})\b", str(exc))
+        status = int(match.group(1)) if match else None
+    return status
+
+def _is_transient_search_error(exc: BaseException) -> bool:
+    """Retry timeouts, connection errors, 429s and 5xx; a bad key or request fails at once."""
+    status = _search_error_status(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, _TRANSIENT_SEARCH_ERRORS)
+
+_search_retry = retry(
+    retry=retry_if_exception(_is_transient_search_error),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=0.2, max=2),
+    reraise=True,
+)
+
+@_search_retry
+def _do_search(query: str) -> List[Dict]:
+    return get_search_tool().invoke(query)
+
+@_search_retry
+async def _ado_search(query: str) -> List[Dict]:
+    return await get_search_tool().ainvoke(query)
+
+def _search(query: str) -> List[Dict]:
+    key = _search_cache_key(query)
+    results = _get_cached_search(key)
+    if results is not None:
+        _search_cache_stats["hits"] += 1
+    else:
+        _search_cache_stats["misses"] += 1
+        _check_search_breaker()
+        try:
+            results = _do_search(query)
+        except Exception:
+            _record_search_failure()
+            raise
+        _store_search(key, results)
+    return results
+
+# Deletes the claim only while it still holds the caller's token, so a worker
+# whose claim expired mid-search can't release one another worker has since taken
+_RELEASE_CLAIM_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+def _search_claim_key(key: str) -> str:
+    return f"{REDIS_SEARCH_PREFIX}lock:{key}"
+
+async def _await_other_worker_search(key: str) -> Tuple[Optional[List[Dict]], Optional[str]]:
+    """Claim the search for this key across workers, or wait for the worker that already has.
+
+    Returns (results, None) with the other worker's results, (None, token) when this
+    worker claimed the search, or (None, None) when it should search without a claim.
+    """
+    redis_client = get_async_redis()
+    if redis_client is None:
+        return None, None
+    lock_key = _search_claim_key(key)
+    token = uuid.uuid4().hex
+    try:
+        if await redis_client.set(lock_key, token, nx=True, ex=REDIS_LOCK_TTL):
+            return None, token
+        deadline = time.monotonic() + REDIS_LOCK_TTL
+        while time.monotonic() < deadline and await redis_client.exists(lock_key):
+            await asyncio.sleep(0.2)
+            results = await _aget_cached_search(key)
+            if results is not None:
+                return results, None
+    except Exception:
+        pass
+    return None, None
+
+async def _release_search_claim(key: str, token: str):
+    redis_client = get_async_redis()
+    if redis_client is not None:
+        try:
+            await redis_client.eval(_RELEASE_CLAIM_SCRIPT, 1, _search_claim_key(key), token)
+        except Exception:
+            pass
+
+async def _asearch(query: str) -> List[Dict]:
+    key = _search_cache_key(query)
+    results = await _aget_cached_search(key)
+    if results is not None:
+        _search_cache_stats["hits"] += 1
+        return results
+
+    # One search per key at a time; concurrent callers wait and then hit the cache
+    lock = _search_locks.setdefault(key, asyncio.Lock())
+    _search_lock_users[key] = _search_lock_users.get(key, 0) + 1
+    try:
+        async with lock:
+            results = await _aget_cached_search(key)
+            claim = None
+            if results is None:
+                results, claim = await _await_other_worker_search(key)
+            if results is not None:
+                _search_cache_stats["hits"] += 1
+            else:
+                _search_cache_stats["misses"] += 1
+                try:
+                    _check_search_breaker()
+                    try:
+                        results = await _ado_search(query)
+                    except Exception:
+                        _record_search_failure()
+                        raise
+                    await _astore_search(key, results)
+                finally:
+                    if claim is not None:
+                        await _release_search_claim(key, claim)
+    finally:
+        _search_lock_users[key] -= 1
+        if not _search_lock_users[key]:
+            del _search_lock_users[key], _search_locks[key]
+    return results
+
+def _build_search_response(query: str, search_results: List[Dict]) -> Dict[str, Any]:
+    """Package raw Tavily results as the formatted context plus structured records."""
+    return {
+        "query": query,
+        "context": format_search_results(search_results),
+        "results": [
+            {
+                "title": result.get("title", "No title"),
+                "url": result.get("url", "No URL"),
+                "content": result.get("content", "")[:200] + "..."
+            }
+            for result in search_results[:5]
+        ]
+    }
+
+def _search_unavailable(query: str, error: Exception = None) -> Dict[str, Any]:
+    if error is None:
+        context = "Search functionality is not available. Please verify your Tavily API key."
+    else:
+        context = f"Error performing search: {str(error)}. No context available."
+    # "error" marks the fallback context so callers don't cache answers built on it
+    return {"query": query, "context": context, "results": [], "error": str(error) if error else "unavailable"}
+
+def search_and_format(query: str) -> Dict[str, Any]:
+    """Search for information and return both the formatted context and structured results."""
+    if get_search_tool() is None:
+        return _search_unavailable(query)
     
     try:
-        search_results = search_tool.invoke(query)
-        context = format_search_results(search_results)
-        return {
-            "query": query,
-            "context": context
-        }
+        return _build_search_response(query, _search(query))
     except Exception as e:
-        return {
-            "query": query,
-            "context": f"Error performing search: {str(e)}. No context available."
-        }
+        return _search_unavailable(query, e)
+
+async def asearch_and_format(query: str) -> Dict[str, Any]:
+    """Async variant of search_and_format that does not block the event loop."""
+    if get_search_tool() is None:
+        return _search_unavailable(query)
+    
+    try:
+        return _build_search_response(query, await _asearch(query))
+    except Exception as e:
+        return _search_unavailable(query, e)
+
+# Single search runnable shared by every verifier chain
+SEARCH_RUNNABLE = RunnableLambda(search_and_format, afunc=asearch_and_format)
+
+# ===========================
+# COMPARER SHORT-CIRCUIT
+# ===========================
+
+# When the generator and verifier already say nearly the same thing the
+# comparer would only restate the verifier's answer, so skip that LLM call
+SHORT_CIRCUIT_RATIO = 0.85
+_short_circuit_stats = {"checked": 0, "bypassed": 0}
+
+def answers_agree(intermediate_results: Dict[str, Any]) -> bool:
+    """Check whether the generator and verifier answers are near-identical."""
+    matcher = SequenceMatcher(None, intermediate_results["generator_answer"], intermediate_results["verifier_answer"])
+    # The quick ratios are cheap upper bounds, so most disagreeing pairs stop here
+    agree = (
+        matcher.real_quick_ratio() > SHORT_CIRCUIT_RATIO
+        and matcher.quick_ratio() > SHORT_CIRCUIT_RATIO
+        and matcher.ratio() > SHORT_CIRCUIT_RATIO
+    )
+    _short_circuit_stats["checked"] += 1
+    _short_circuit_stats["bypassed"] += agree
+    return agree
+
+def get_short_circuit_stats() -> Dict[str, Any]:
+    """Get how often the comparer has been skipped."""
+    checked = _short_circuit_stats["checked"]
+    return {**_short_circuit_stats, "bypass_rate": _short_circuit_stats["bypassed"] / checked if checked else 0.0}
+
+def short_circuit_answer(intermediate_results: Dict[str, Any]) -> str:
+    """Render the verifier's answer in the comparer's output shape: cleaned answer, then the score block."""
+    result = _assemble_result(intermediate_results, intermediate_results["verifier_answer"], short_circuited=True)
+    scores = result["scores"]
+    return (
+        f"{result['answer']}\n\n"
+        f"AGREEMENT_SCORE: {scores['Agreement']}\n"
+        f"FINAL_TRUST_SCORE: {scores['Final Trust']}"
+    )
+
+def with_short_circuit(comparer_chain):
+    """Route agreeing answers straight to the output, everything else through the comparer."""
+    return RunnableBranch(
+        (answers_agree, RunnableLambda(short_circuit_answer)),
+        comparer_chain,
+    )
 
 # ===========================
 # COMPONENT CHAINS
 # ===========================
 
-# Initialize chains only if models are available
-generator_chain = None
-verifier_chain = None
-comparer_chain = None
-complete_system = None
+# Chains are only built if their models are available
 
-if generator_llm:
-    generator_chain = (
+@functools.cache
+def get_generator_chain():
+    if not get_generator_llm():
+        return None
+    return (
         {"query": RunnablePassthrough()}
-        | generator_prompt_template
-        | generator_llm
+        | get_generator_prompt_template()
+        | get_generator_llm()
         | StrOutputParser()
     )
 
-if verifier_llm:
-    search_runnable = RunnableLambda(search_and_format)
-    verifier_chain = (
-        search_runnable
-        | verifier_prompt_template
-        | verifier_llm
+@functools.cache
+def get_verifier_chain():
+    if not get_verifier_llm():
+        return None
+    return (
+        SEARCH_RUNNABLE
+        | get_verifier_prompt_template()
+        | get_verifier_llm()
         | StrOutputParser()
     )
 
-if comparer_llm:
-    comparer_chain = (
-        comparer_prompt_template
-        | comparer_llm
+@functools.cache
+def get_comparer_chain():
+    if not get_comparer_llm():
+        return None
+    return (
+        get_comparer_prompt_template()
+        | get_comparer_llm()
         | StrOutputParser()
     )
 
-if all([generator_chain, verifier_chain, comparer_chain]):
-    complete_system = (
+@functools.cache
+def get_complete_system():
+    if not all([get_generator_chain(), get_verifier_chain(), get_comparer_chain()]):
+        return None
+    return (
         RunnableParallel(
             query=RunnablePassthrough(),
-            generator_answer=generator_chain,
-            verifier_answer=verifier_chain,
+            generator_answer=get_generator_chain(),
+            verifier_answer=get_verifier_chain(),
         )
-        | comparer_chain
+        | with_short_circuit(get_comparer_chain())
     )
-else:
-    complete_system = None
 
 # ===========================
 # DOMAIN-SPECIFIC FUNCTIONS
@@ -340,36 +1064,49 @@ def create_search_qa_prompt_template(system_prompt: str = "You are a factual ass
     2.  If the CONTEXT does not contain the answer, state that you cannot answer based on the information provided.
     3.  Do not use internal knowledge not present in the context.
     4.  Extract key facts, figures, and consensus from the context.
+    5.  Respond in at most 300 words.
 
     FACTUAL_ACCURACY_SCORE: [0-100] (Confidence in the answer based on context)
     """
     )
 
-def create_domain_chains(domain: str = "general"):
-    """Create domain-specific chains with custom prompts."""
-    domain_config = get_domain_config(domain)
+@functools.cache
+def get_domain_templates(domain: str = "general") -> Tuple[ChatPromptTemplate, ChatPromptTemplate, ChatPromptTemplate]:
+    """Return the (generator, verifier, comparer) templates for a domain, compiled once."""
+    if domain not in DOMAINS:
+        domain = "general"
+    domain_config = DOMAINS[domain]
 
-    # Create domain-specific prompt templates
-    gen_template = create_generator_prompt_template(domain_config["system_prompt"])
+    # The general domain's generator prompt is the default one, so share that template
+    if domain_config["system_prompt"] == DOMAINS["general"]["system_prompt"]:
+        gen_template = get_generator_prompt_template()
+    else:
+        gen_template = create_generator_prompt_template(domain_config["system_prompt"])
     
     # CHANGED: Use Search QA Template for parallel execution
     # The Verifier now acts as a "Fact Retriever" that runs in parallel with the Generator
-    ver_template = create_search_qa_prompt_template(
-        "You are a factual assistant specialized in " + domain_config["description"].lower() + 
-        ". Answer the following user query based ONLY on the provided search results context. Do not use any of your internal knowledge."
-    )
-    
-    comp_template = create_comparer_prompt_template(
-        "You are a meticulous fact-checking and synthesis agent specialized in " + domain_config["description"].lower() + 
-        ". Your goal is to produce the most accurate and reliable answer to the user's query by comparing two different AI-generated answers."
-    )
+    ver_template = create_search_qa_prompt_template(domain_config["verifier_system_prompt"])
+    comp_template = create_comparer_prompt_template(domain_config["comparer_system_prompt"])
+
+    return gen_template, ver_template, comp_template
+
+def create_domain_chains(domain: str = "general"):
+    """Create domain-specific chains with custom prompts."""
+    domain_config = get_domain_config(domain)
+    gen_template, ver_template, comp_template = get_domain_templates(domain)
 
     # Create domain-specific chains
     domain_generator_chain = None
     domain_verifier_chain = None
+    domain_grounded_verifier_chain = None
     domain_comparer_chain = None
+    domain_parallel_chain = None
     domain_complete_system = None
 
+    generator_llm = get_generator_llm()
+    verifier_llm = get_verifier_llm()
+    comparer_llm = get_comparer_llm()
+
     if generator_llm:
         domain_generator_chain = (
             {"query": RunnablePassthrough()}
@@ -379,13 +1116,13 @@ def create_domain_chains(domain: str = "general"):
         )
 
     if verifier_llm:
-        search_runnable = RunnableLambda(search_and_format)
-        domain_verifier_chain = (
-            search_runnable
-            | ver_template
+        # Verifier step on an already-fetched search response, for callers that inspect the search
+        domain_grounded_verifier_chain = (
+            ver_template
             | verifier_llm
             | StrOutputParser()
         )
+        domain_verifier_chain = SEARCH_RUNNABLE | domain_grounded_verifier_chain
 
     if comparer_llm:
         domain_comparer_chain = (
@@ -395,132 +1132,263 @@ def create_domain_chains(domain: str = "general"):
         )
 
     if all([domain_generator_chain, domain_verifier_chain, domain_comparer_chain]):
-        domain_complete_system = (
-            RunnableParallel(
-                query=RunnablePassthrough(),
-                generator_answer=domain_generator_chain,
-                verifier_answer=domain_verifier_chain,
-            )
-            | domain_comparer_chain
+        domain_parallel_chain = RunnableParallel(
+            query=RunnablePassthrough(),
+            generator_answer=domain_generator_chain,
+            verifier_answer=domain_verifier_chain,
         )
+        domain_complete_system = domain_parallel_chain | with_short_circuit(domain_comparer_chain)
 
     return {
         "generator_chain": domain_generator_chain,
         "verifier_chain": domain_verifier_chain,
+        "grounded_verifier_chain": domain_grounded_verifier_chain,
         "comparer_chain": domain_comparer_chain,
+        "parallel_chain": domain_parallel_chain,
         "complete_system": domain_complete_system,
         "domain_config": domain_config
     }
 
+# Each domain's chains are built on its first request and reused afterwards
+@functools.cache
+def get_domain_chains(domain: str = "general") -> Dict[str, Any]:
+    """Return the cached chains for a domain, falling back to general."""
+    if domain not in DOMAINS:
+        domain = "general"
+    return create_domain_chains(domain)
+
+# ===========================
+# SCORE PARSING
+# ===========================
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+
+def _compile_score_patterns(key: str) -> List[re.Pattern]:
+    """Build the fallback patterns for a score key, most specific first."""
+    patterns = [
+        # 1. Exact match with colon (e.g., "FACTUAL_ACCURACY_SCORE: 85")
+        f"{key}:\\s*\\[?{_NUMBER}",
+        # 2. Spaces instead of underscores (e.g., "FACTUAL ACCURACY SCORE: 85")
+        f"{key.replace('_', ' ')}:\\s*\\[?{_NUMBER}",
+    ]
+    # 3. Just the short key (e.g., "ACCURACY: 85")
+    if "SCORE" in key:
+        # FINAL_TRUST_SCORE shortens to FINAL, which misses "Final Trust Score"
+        if "TRUST" in key:
+            patterns.append(f"Trust.*?:\\s*\\[?{_NUMBER}")
+        patterns.append(f"{key.split('_')[0]}[^\\n]*?:\\s*\\[?{_NUMBER}")
+    # 4. Fallback: the first number after the key's first word
+    patterns.append(f"{key.split('_')[0]}.*?{_NUMBER}")
+    return [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+SCORE_KEYS = ("CONFIDENCE_SCORE", "FACTUAL_ACCURACY_SCORE", "HALLUCINATION_SCORE", "AGREEMENT_SCORE", "FINAL_TRUST_SCORE")
+_SCORE_PATTERNS = {key: _compile_score_patterns(key) for key in SCORE_KEYS}
+
+# Everything from the score line onwards is stripped from the final answer
+_SCORE_BLOCK_RE = re.compile(r"(AGREEMENT_SCORE|FINAL_TRUST_SCORE):.*", re.DOTALL | re.IGNORECASE)
+_CLEAN_FACTUAL_ACCURACY = re.compile(r"FACTUAL_ACCURACY_SCORE:.*", re.DOTALL | re.IGNORECASE)
+
+# One alternation covering every labelled score, so each output is scanned once
+_SCORE_LINE_RE = re.compile(
+    r"(CONFIDENCE|FACTUAL[_ ]ACCURACY|HALLUCINATION|AGREEMENT|FINAL[_ ]TRUST)[_ ]?SCORE[^\n:]{0,40}:\s*\[?" + _NUMBER,
+    re.IGNORECASE,
+)
+
+def scan_scores(text: str) -> Dict[str, float]:
+    """Collect the first value of every labelled score in a single pass, keyed like SCORE_KEYS."""
+    scores = {}
+    for match in _SCORE_LINE_RE.finditer(text):
+        key = match.group(1).upper().replace(" ", "_") + "_SCORE"
+        scores.setdefault(key, float(match.group(2)))
+    return scores
+
+def parse_score(text: str, key: str, default: float = 0.0) -> float:
+    """Extract a score from model output, trying the precompiled patterns in order."""
+    patterns = _SCORE_PATTERNS.get(key) or _compile_score_patterns(key)
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return default
+
 # ===========================
 # MAIN UTILITY FUNCTION
 # ===========================
 
-def run_hallucination_reduction_system(query: str, domain: str = "general", verbose: bool = True) -> str:
+# The comparer's score block sits at the end of its answer, so streamed output
+# only needs this many trailing characters scanned
+SCORE_TAIL_CHARS = 500
+
+def _assemble_result(intermediate_results: Dict[str, Any], final_answer_raw: str, short_circuited: bool,
+                     final_score_text: Optional[str] = None) -> Dict[str, Any]:
+    """Parse the scores out of every model output and strip the score block from the final answer."""
+    # One scan per output; the looser fallback patterns only run for missing labels
+    def score(text, key, scanned):
+        return scanned[key] if key in scanned else parse_score(text, key)
+
+    generator_scores = scan_scores(intermediate_results["generator_answer"])
+    verifier_scores = scan_scores(intermediate_results["verifier_answer"])
+    confidence = score(intermediate_results["generator_answer"], "CONFIDENCE_SCORE", generator_scores)
+    factual_accuracy = score(intermediate_results["verifier_answer"], "FACTUAL_ACCURACY_SCORE", verifier_scores)
+    hallucination_score = score(intermediate_results["verifier_answer"], "HALLUCINATION_SCORE", verifier_scores)
+    if short_circuited:
+        # No comparer output to parse; agreement is the measured similarity
+        agreement_score = round(SequenceMatcher(None, intermediate_results["generator_answer"], final_answer_raw).ratio() * 100, 1)
+        final_trust_score = factual_accuracy
+    else:
+        if final_score_text is None:
+            final_score_text = final_answer_raw
+        final_scores = scan_scores(final_score_text)
+        agreement_score = score(final_score_text, "AGREEMENT_SCORE", final_scores)
+        final_trust_score = score(final_score_text, "FINAL_TRUST_SCORE", final_scores)
+    
+    # Clean up final answer (remove the score block)
+    clean_answer = _SCORE_BLOCK_RE.sub("", final_answer_raw).strip()
+    if short_circuited:
+        clean_answer = _CLEAN_FACTUAL_ACCURACY.sub("", clean_answer).strip()
+    
+    # Structure the return
+    return {
+        "answer": clean_answer,
+        "scores": {
+            "Confidence": confidence,
+            "Factual Accuracy": factual_accuracy,
+            "Hallucination Score": hallucination_score,
+            "Agreement": agreement_score,
+            "Final Trust": final_trust_score
+        },
+        "debug": {
+            "generator_raw": intermediate_results["generator_answer"],
+            "verifier_raw": intermediate_results["verifier_answer"]
+        }
+    }
+
+async def arun_hallucination_reduction_system(query: str, domain: str = "general", verbose: bool = True) -> str:
     """Run the complete hallucination reduction system on a given query with domain-specific prompts."""
 
-    # Create domain-specific chains
-    domain_chains = create_domain_chains(domain)
+    # Look up the cached domain-specific chains
+    domain_chains = get_domain_chains(domain)
 
     if not domain_chains["generator_chain"] or not domain_chains["verifier_chain"] or not domain_chains["comparer_chain"]:
         return "System not properly initialized. Please check API keys."
 
+    async def search_then_verify() -> Tuple[str, bool]:
+        search = await asearch_and_format(query)
+        answer = await domain_chains["grounded_verifier_chain"].ainvoke(search)
+        # Answers built on the "no context" fallback must not be cached
+        return answer, bool(search["results"]) and "error" not in search
+
     try:
-        # Step 1: Run Generator and Verifier in parallel
-        parallel_chain = RunnableParallel(
-            query=RunnablePassthrough(),
-            generator_answer=domain_chains["generator_chain"],
-            verifier_answer=domain_chains["verifier_chain"],
-        )
-        intermediate_results = parallel_chain.invoke(query)
+        # Step 1: Run Generator and Verifier concurrently; if either fails the other is cancelled.
+        # A cached verifier answer for the same (or a paraphrased) query skips search + verifier.
+        cached_verifier = await verifier_cache.aget(query, domain)
+        async with asyncio.TaskGroup() as tg:
+            generator_task = tg.create_task(domain_chains["generator_chain"].ainvoke(query))
+            if cached_verifier is None:
+                verifier_task = tg.create_task(search_then_verify())
+        if cached_verifier is None:
+            verifier_answer, grounded = verifier_task.result()
+            if grounded:
+                await verifier_cache.aset(query, {"verifier_answer": verifier_answer, "domain": domain}, domain)
+        else:
+            verifier_answer = cached_verifier["verifier_answer"]
+        intermediate_results = {
+            "query": query,
+            "generator_answer": generator_task.result(),
+            "verifier_answer": verifier_answer,
+        }
         
-        # Step 2: Run Comparer
-        final_answer_raw = domain_chains["comparer_chain"].invoke(intermediate_results)
+        # Step 2: Run Comparer (skipped when both answers already agree)
+        short_circuited = answers_agree(intermediate_results)
+        if short_circuited:
+            final_answer_raw = intermediate_results["verifier_answer"]
+        else:
+            final_answer_raw = await domain_chains["comparer_chain"].ainvoke(intermediate_results)
         
         # Step 3: Parse Scores
-        import re
-        def parse_score(text, key, default=0.0):
-            # 1. Try exact match with colon (e.g., "FACTUAL_ACCURACY_SCORE: 85")
-            match = re.search(f"{key}:\\s*\\[?(\\d+(?:\\.\\d+)?)", text, re.IGNORECASE)
-            if match:
-                return float(match.group(1))
-            
-            # 2. Try with spaces instead of underscores (e.g., "FACTUAL ACCURACY SCORE: 85")
-            key_spaced = key.replace("_", " ")
-            match = re.search(f"{key_spaced}:\\s*\\[?(\\d+(?:\\.\\d+)?)", text, re.IGNORECASE)
-            if match:
-                return float(match.group(1))
-                
-            # 3. Try just the short key (e.g., "ACCURACY: 85")
-            if "SCORE" in key:
-                short_key = key.split("_")[0] # e.g., CONFIDENCE or FACTUAL
-                # Handle "Final Trust": key is FINAL_TRUST_SCORE -> short is FINAL. 
-                # That's not good if text is "Final Trust Score".
-                # Let's try more flexible matching.
-                
-                # specific for Final Trust
-                if "TRUST" in key:
-                     match = re.search(r"Trust.*?:\s*\[?(\d+(?:\.\d+)?)", text, re.IGNORECASE)
-                     if match: return float(match.group(1))
-                     
-                short_key = key.split("_")[0]
-                match = re.search(f"{short_key}[^\\n]*?:\\s*\\[?(\\d+(?:\\.\\d+)?)", text, re.IGNORECASE)
-                if match:
-                    return float(match.group(1))
-            
-            # 4. Fallback: Look for the key and take the first number that appears after it on the same line
-            key_parts = key.split("_")
-            primary_key = key_parts[0] # e.g. FACTUAL
-            fallback_pattern = f"{primary_key}.*?(\\d+(?:\\.\\d+)?)"
-            match = re.search(fallback_pattern, text, re.IGNORECASE)
-            if match:
-                 return float(match.group(1))
-
-            return default
-
-        confidence = parse_score(intermediate_results["generator_answer"], "CONFIDENCE_SCORE")
-        factual_accuracy = parse_score(intermediate_results["verifier_answer"], "FACTUAL_ACCURACY_SCORE")
-        hallucination_score = parse_score(intermediate_results["verifier_answer"], "HALLUCINATION_SCORE")
-        agreement_score = parse_score(final_answer_raw, "AGREEMENT_SCORE")
-        final_trust_score = parse_score(final_answer_raw, "FINAL_TRUST_SCORE")
-        
-        # Clean up final answer (remove the score block)
-        clean_answer = re.sub(r"AGREEMENT_SCORE:.*", "", final_answer_raw, flags=re.DOTALL | re.IGNORECASE).strip()
-        clean_answer = re.sub(r"FINAL_TRUST_SCORE:.*", "", clean_answer, flags=re.DOTALL | re.IGNORECASE).strip()
-        
-        # Structure the return
-        return {
-            "answer": clean_answer,
-            "scores": {
-                "Confidence": confidence,
-                "Factual Accuracy": factual_accuracy,
-                "Hallucination Score": hallucination_score,
-                "Agreement": agreement_score,
-                "Final Trust": final_trust_score
-            },
-            "debug": {
-                "generator_raw": intermediate_results["generator_answer"],
-                "verifier_raw": intermediate_results["verifier_answer"]
-            }
-        }
+        return _assemble_result(intermediate_results, final_answer_raw, short_circuited)
 
+    except ExceptionGroup as eg:
+        return f"System error: {eg.exceptions[0]}"
     except Exception as e:
         return f"System error: {e}"
 
+async def astream_run(query: str, domain: str = "general"):
+    """Stream the final answer as {"token": ...} events, then yield {"result": ...} with the parsed scores."""
+    domain_chains = get_domain_chains(domain)
+    intermediate_results = await domain_chains["parallel_chain"].ainvoke(query)
+
+    short_circuited = answers_agree(intermediate_results)
+    if short_circuited:
+        final_answer_raw = intermediate_results["verifier_answer"]
+        yield {"token": final_answer_raw}
+    else:
+        chunks = []
+        async for chunk in domain_chains["comparer_chain"].astream(intermediate_results):
+            chunks.append(chunk)
+            yield {"token": chunk}
+        final_answer_raw = "".join(chunks)
+
+    yield {"result": _assemble_result(
+        intermediate_results, final_answer_raw, short_circuited, final_answer_raw[-SCORE_TAIL_CHARS:]
+    )}
+
+BATCH_RATE_LIMIT_RETRIES = 3
+
+async def arun_batch(queries: List[str], domain: str = "general", max_concurrency: int = 8) -> List[str]:
+    """Run many queries through the domain's complete system with bounded concurrency.
+
+    Queries rejected with a 429 are retried with exponential backoff; other
+    failures come back as error strings in their slot.
+    """
+    domain_complete_system = get_domain_chains(domain)["complete_system"]
+    if not domain_complete_system:
+        return ["System not properly initialized. Please check API keys."] * len(queries)
+
+    results: List[Any] = [None] * len(queries)
+    pending = list(range(len(queries)))
+    for attempt in range(BATCH_RATE_LIMIT_RETRIES + 1):
+        outputs = await domain_complete_system.abatch(
+            [queries[i] for i in pending],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True,
+        )
+        rate_limited = []
+        for i, output in zip(pending, outputs):
+            if isinstance(output, RateLimitError) and attempt < BATCH_RATE_LIMIT_RETRIES:
+                rate_limited.append(i)
+            elif isinstance(output, Exception):
+                results[i] = f"System error: {output}"
+            else:
+                results[i] = output
+        if not rate_limited:
+            break
+        pending = rate_limited
+        await asyncio.sleep(2 ** attempt)
+
+    return results
+
+def run_hallucination_reduction_system(query: str, domain: str = "general", verbose: bool = True) -> str:
+    """Synchronous wrapper around arun_hallucination_reduction_system for legacy callers."""
+    return _run_sync(arun_hallucination_reduction_system(query, domain, verbose))
+
+@functools.cache
+def get_context_verifier_template(domain: str = "general") -> ChatPromptTemplate:
+    """Get the cached Search QA template used when the search context is fetched separately."""
+    if domain not in DOMAINS:
+        domain = "general"
+    # CHANGED: Use new Search QA template here as well to match main logic
+    return create_search_qa_prompt_template(DOMAINS[domain]["verifier_scored_system_prompt"])
+
 def run_comparer_only(query: str, generator_answer: str, verifier_answer: str, domain: str = "general") -> str:
     """
     Run only the comparer model with pre-computed generator and verifier answers.
     This is much faster as it avoids re-running generator and verifier.
     """
-    domain_config = get_domain_config(domain)
-    
-    # Create domain-specific comparer template
-    comp_template = create_comparer_prompt_template(
-        "You are a meticulous fact-checking and synthesis agent specialized in " + 
-        domain_config["description"].lower() + 
-        ". Your goal is to produce the most accurate and reliable answer to the user's query by comparing two different AI-generated answers."
-    )
+    # Same compiled template the domain's comparer chain uses
+    comp_template = get_domain_templates(domain)[2]
     
+    comparer_llm = get_comparer_llm()
     if not comparer_llm:
         return "Comparer model not initialized. Please check API keys."
     
@@ -541,17 +1409,9 @@ def run_verifier_with_context(query: str, context: str, domain: str = "general")
     Run only the verifier model with pre-fetched search context.
     This eliminates the duplicate search call that was inside verifier_chain.
     """
-    domain_config = get_domain_config(domain)
-    
-    # Create domain-specific verifier template
-    # CHANGED: Use new Search QA template here as well to match main logic
-    ver_template = create_search_qa_prompt_template(
-        "You are a factual assistant specialized in " + 
-        domain_config["description"].lower() + 
-        ". Answer the following user query based ONLY on the provided search results context.\n\n"
-        "IMPORTANT: You MUST end your response with:\nFACTUAL_ACCURACY_SCORE: [0-100]"
-    )
+    ver_template = get_context_verifier_template(domain)
     
+    verifier_llm = get_verifier_llm()
     if not verifier_llm:
         return "Verifier model not initialized. Please check API keys."
     
@@ -566,58 +1426,144 @@ def run_verifier_with_context(query: str, context: str, domain: str = "general")
     except Exception as e:
         return f"Verifier error: {e}"
 
+async def arun_comparer_only(query: str, generator_answer: str, verifier_answer: str, domain: str = "general",
+                             raise_errors: bool = False) -> str:
+    """Async variant of run_comparer_only that does not block the event loop.
+
+    With raise_errors, failures propagate instead of coming back as an error string.
+    """
+    comp_template = get_domain_templates(domain)[2]
+
+    comparer_llm = get_comparer_llm()
+    if not comparer_llm:
+        if raise_errors:
+            raise RuntimeError("Comparer model not initialized. Please check API keys.")
+        return "Comparer model not initialized. Please check API keys."
+
+    try:
+        messages = comp_template.format_messages(
+            query=query,
+            generator_answer=generator_answer,
+            verifier_answer=verifier_answer
+        )
+        response = await comparer_llm.ainvoke(messages)
+        return response.content
+    except Exception as e:
+        if raise_errors:
+            raise
+        return f"Comparer error: {e}"
+
+async def arun_verifier_with_context(query: str, context: str, domain: str = "general",
+                                     raise_errors: bool = False) -> str:
+    """Async variant of run_verifier_with_context that does not block the event loop.
+
+    With raise_errors, failures propagate instead of coming back as an error string.
+    """
+    ver_template = get_context_verifier_template(domain)
+
+    verifier_llm = get_verifier_llm()
+    if not verifier_llm:
+        if raise_errors:
+            raise RuntimeError("Verifier model not initialized. Please check API keys.")
+        return "Verifier model not initialized. Please check API keys."
+
+    try:
+        messages = ver_template.format_messages(
+            query=query,
+            context=context
+        )
+        response = await verifier_llm.ainvoke(messages)
+        return response.content
+    except Exception as e:
+        if raise_errors:
+            raise
+        return f"Verifier error: {e}"
+
+async def atest_individual_models(query: str = "What is the capital of France?"):
+    """Test each model individually to ensure they're working properly (all probes run concurrently)."""
+
+    search_tool = get_search_tool()
+    generator_llm = get_generator_llm()
+    verifier_llm = get_verifier_llm()
+    comparer_llm = get_comparer_llm()
+
+    async def test_search():
+        if not search_tool:
+            return "Not initialized"
+        search_results = await search_tool.ainvoke(query)
+        return f"Found {len(search_results)} results"
+
+    async def test_generator():
+        if not generator_llm:
+            return "Not initialized"
+        test_prompt = get_generator_prompt_template().format_messages(query=query)
+        response = await generator_llm.ainvoke(test_prompt)
+        return response.content[:100] + "..."
+
+    async def test_verifier():
+        if not verifier_llm:
+            return "Not initialized"
+        test_prompt = get_verifier_prompt_template().invoke({
+            "query": query,
+            "context": "France is a country in Europe. Its capital city is Paris.",
+            "generator_answer": "The capital of France is Paris."
+        })
+        response = await verifier_llm.ainvoke(test_prompt)
+        return response.content[:100] + "..."
+
+    async def test_comparer():
+        if not comparer_llm:
+            return "Not initialized"
+        test_prompt = get_comparer_prompt_template().format_messages(
+            query=query,
+            generator_answer="The capital of France is Paris.",
+            verifier_answer="Based on the search results, the capital of France is Paris."
+        )
+        response = await comparer_llm.ainvoke(test_prompt)
+        return response.content[:100] + "..."
+
+    keys = ("search", "generator", "verifier", "comparer")
+    outcomes = await asyncio.gather(
+        test_search(),
+        test_generator(),
+        test_verifier(),
+        test_comparer(),
+        return_exceptions=True
+    )
+
+    return {
+        key: f"Error: {outcome}" if isinstance(outcome, Exception) else outcome
+        for key, outcome in zip(keys, outcomes)
+    }
+
 def test_individual_models(query: str = "What is the capital of France?"):
-    """Test each model individually to ensure they're working properly."""
-    results = {}
-    
-    # Test Search Tool
-    if search_tool:
-        try:
-            search_results = search_tool.invoke(query)
-            results['search'] = f"Found {len(search_results)} results"
-        except Exception as e:
-            results['search'] = f"Error: {e}"
-    else:
-        results['search'] = "Not initialized"
-    
-    # Test Generator
-    if generator_llm:
-        try:
-            test_prompt = generator_prompt_template.format_messages(query=query)
-            response = generator_llm.invoke(test_prompt)
-            results['generator'] = response.content[:100] + "..."
-        except Exception as e:
-            results['generator'] = f"Error: {e}"
-    else:
-        results['generator'] = "Not initialized"
-    
-    # Test Verifier
-    if verifier_llm:
-        try:
-            test_prompt = verifier_prompt_template.format_messages(
-                query=query, 
-                context="France is a country in Europe. Its capital city is Paris."
-            )
-            response = verifier_llm.invoke(test_prompt)
-            results['verifier'] = response.content[:100] + "..."
-        except Exception as e:
-            results['verifier'] = f"Error: {e}"
-    else:
-        results['verifier'] = "Not initialized"
-    
-    # Test Comparer
-    if comparer_llm:
-        try:
-            test_prompt = comparer_prompt_template.format_messages(
-                query=query,
-                generator_answer="The capital of France is Paris.",
-                verifier_answer="Based on the search results, the capital of France is Paris."
-            )
-            response = comparer_llm.invoke(test_prompt)
-            results['comparer'] = response.content[:100] + "..."
-        except Exception as e:
-            results['comparer'] = f"Error: {e}"
-    else:
-        results['comparer'] = "Not initialized"
-    
-    return results
\ No newline at end of file
+    """Synchronous wrapper around atest_individual_models."""
+    return _run_sync(atest_individual_models(query))
+
+# ===========================
+# LAZY MODULE ATTRIBUTES
+# ===========================
+
+# Legacy callers still import the models, templates and chains by name;
+# resolve those through the cached getters on first access
+_LAZY_ATTRIBUTES = {
+    "generator_llm": get_generator_llm,
+    "verifier_llm": get_verifier_llm,
+    "comparer_llm": get_comparer_llm,
+    "search_tool": get_search_tool,
+    "generator_prompt_template": get_generator_prompt_template,
+    "verifier_prompt_template": get_verifier_prompt_template,
+    "comparer_prompt_template": get_comparer_prompt_template,
+    "generator_chain": get_generator_chain,
+    "verifier_chain": get_verifier_chain,
+    "comparer_chain": get_comparer_chain,
+    "complete_system": get_complete_system,
+    "DOMAIN_TEMPLATES": lambda: {domain: get_domain_templates(domain) for domain in DOMAINS},
+    "DOMAIN_CHAINS": lambda: {domain: get_domain_chains(domain) for domain in DOMAINS},
+}
+
+def __getattr__(name: str):
+    getter = _LAZY_ATTRIBUTES.get(name)
+    if getter is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getter()
@@ -1,39 +1,50 @@
-import os
 import sys
 import asyncio
-from dotenv import load_dotenv
 
-# Ensure we can import from the current directory
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Use libuv's event loop when available (winloop on Windows); the stdlib loop is the fallback
+try:
+    if sys.platform == "win32":
+        import winloop as uvloop
+    else:
+        import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
 from llm_system import (
-    generator_llm,
-    verifier_llm,
-    comparer_llm,
-    search_tool,
-    generator_prompt_template,
-    verifier_prompt_template,
-    comparer_prompt_template
+    get_generator_llm,
+    get_verifier_llm,
+    get_comparer_llm,
+    get_search_tool,
+    get_generator_prompt_template,
+    get_verifier_prompt_template,
+    get_comparer_prompt_template
 )
 
-# Load environment variables
-load_dotenv()
-
 def print_separator():
     print("\n" + "="*50 + "\n")
 
-def get_multiline_input(prompt_text):
+async def ainput(prompt_text=""):
+    # Read stdin in a worker thread so the event loop keeps running
+    return await asyncio.to_thread(input, prompt_text)
+
+async def get_multiline_input(prompt_text):
     print(prompt_text + " (Press Ctrl+D or Ctrl+Z on new line to finish):")
+    if not sys.stdin.isatty():
+        # Piped input: read it in one go instead of line by line
+        text = await asyncio.to_thread(sys.stdin.read)
+        return text[:-1] if text.endswith("\n") else text
+    # Interactive: keep input() so terminal line editing still works
     lines = []
     try:
         while True:
-            line = input()
+            line = await ainput()
             lines.append(line)
     except EOFError:
         pass
     return "\n".join(lines)
 
-def interact_with_model(model_name, model, prompt_template=None):
+async def interact_with_model(model_name, model, prompt_template=None):
     if not model:
         print(f"❌ {model_name} is not initialized. Please check your API keys.")
         return
@@ -42,7 +53,7 @@ def interact_with_model(model_name, model, prompt_template=None):
     print("Type 'exit' to go back to the main menu.")
     
     while True:
-        user_input = input(f"\n[{model_name}] Enter prompt: ").strip()
+        user_input = (await ainput(f"\n[{model_name}] Enter prompt: ")).strip()
         
         if user_input.lower() in ('exit', 'quit'):
             break
@@ -72,16 +83,24 @@ def interact_with_model(model_name, model, prompt_template=None):
                     # We can ask for context or just provide a placeholder/skip.
                     # Let's verify if we want to search first.
                     print("Options: [1] Just Chat  [2] Search & Verify")
-                    sub_choice = input("Choice (default 1): ").strip()
+                    sub_choice = (await ainput("Choice (default 1): ")).strip()
                     
                     if sub_choice == "2":
+                        search_tool = get_search_tool()
                         if search_tool:
-                            print("🔍 Searching Tavily...")
-                            search_results = search_tool.invoke(user_input)
+                            print("🔍 Searching Tavily while the Generator drafts an answer...")
+                            search_results, generator_response = await asyncio.gather(
+                                search_tool.ainvoke(user_input),
+                                get_generator_llm().ainvoke(get_generator_prompt_template().format_messages(query=user_input))
+                            )
                             from llm_system import format_search_results
                             context = format_search_results(search_results)
                             print(f"✅ Found context ({len(search_results)} results)")
-                            msg = prompt_template.format_messages(query=user_input, context=context)
+                            msg = prompt_template.invoke({
+                                "query": user_input,
+                                "context": context,
+                                "generator_answer": generator_response.content
+                            }).to_messages()
                         else:
                             print("❌ Search tool not available. Using raw chat.")
                             msg = [("human", user_input)]
@@ -101,19 +120,21 @@ def interact_with_model(model_name, model, prompt_template=None):
                 msg = [("human", user_input)]
             
             # Invoke model
-            response = model.invoke(msg)
-            
+            # Stream tokens as they arrive instead of waiting for the full response
             print_separator()
-            if hasattr(response, 'content'):
-                print(response.content)
-            else:
-                print(response)
+            chunks = []
+            async for chunk in model.astream(msg):
+                text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                chunks.append(text)
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            print()
             print_separator()
 
         except Exception as e:
             print(f"❌ Error: {e}")
 
-def main():
+async def main():
     while True:
         print_separator()
         print("🤖 Multi-LLM Interactive Terminal")
@@ -122,14 +143,14 @@ def main():
         print("3. Interact with Comparer (Synthesis)")
         print("4. Exit")
         
-        choice = input("\nSelect an option (1-4): ").strip()
+        choice = (await ainput("\nSelect an option (1-4): ")).strip()
         
         if choice == '1':
-            interact_with_model("Generator", generator_llm, generator_prompt_template)
+            await interact_with_model("Generator", get_generator_llm(), get_generator_prompt_template())
         elif choice == '2':
-            interact_with_model("Verifier", verifier_llm, verifier_prompt_template)
+            await interact_with_model("Verifier", get_verifier_llm(), get_verifier_prompt_template())
         elif choice == '3':
-            interact_with_model("Comparer", comparer_llm, comparer_prompt_template)
+            await interact_with_model("Comparer", get_comparer_llm(), get_comparer_prompt_template())
         elif choice == '4':
             print("Goodbye! 👋")
             break
@@ -138,6 +159,6 @@ def main():
 
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
     except KeyboardInterrupt:
         print("\nGoodbye! 👋")
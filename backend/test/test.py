@@ -6,44 +6,109 @@ A sophisticated system that uses multiple Large Language Models via OpenRouter i
 
 Required Environment Variables:
 - TAVILY_API_KEY: Your Tavily Search API key
-- OPENROUTER_API_KEY: Your OpenRouter API key
+- OPENROUTER_API_KEY1..3: Your OpenRouter API keys (generator, verifier, comparer)
 
 Install required packages:
 pip install langchain langchain-community langchain-openai tavily-python python-dotenv
 """
 
+import io
 import os
+import re
+import sys
+import json
 import time
-from typing import Dict, Any, List
+import atexit
+import asyncio
+import logging
+import hashlib
+import functools
+import contextlib
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+import httpx
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
+from openai import RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential_jitter, retry_if_exception, retry_if_exception_type
+from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough, RunnableParallel, RunnableLambda
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_openai import ChatOpenAI
 
 # Optional: Uncomment to use .env file
 import dotenv
 dotenv.load_dotenv()
 
+# Use libuv's event loop when available (winloop on Windows); the stdlib loop is the fallback
+try:
+    if sys.platform == "win32":
+        import winloop as uvloop
+    else:
+        import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+# ===========================
+# LOGGING
+# ===========================
+
+# Console output goes through one logger: each record is a single write, and
+# the level (not scattered prints) decides what appears
+logger = logging.getLogger("truesynth")
+_handler = logging.StreamHandler(sys.stdout)
+_handler.setFormatter(logging.Formatter("%(message)s"))
+logger.addHandler(_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+SEP = "=" * 80
+RULE = "-" * 40
+
 # ===========================
 # CONFIGURATION SECTION
 # ===========================
 
-# Set up API keys from environment variables
-print("Checking for required API keys...")
+@dataclass(frozen=True, slots=True)
+class Config:
+    """API keys, read and validated once."""
+    tavily_key: str
+    openrouter_keys: Tuple[str, str, str]  # Generator, verifier, comparer
+
+REQUIRED_KEYS = ("TAVILY_API_KEY", "OPENROUTER_API_KEY1", "OPENROUTER_API_KEY2", "OPENROUTER_API_KEY3")
 
-# Required API keys
-tavily_api_key = os.getenv("TAVILY_API_KEY")
-if not tavily_api_key:
-    print("WARNING: TAVILY_API_KEY not found in environment variables")
-    print("Set it using: export TAVILY_API_KEY='your-key-here'")
+@functools.cache
+def get_config() -> Config:
+    """
+    Read the API keys from the environment, exiting with setup instructions if any are missing.
 
-openrouter_api_key = os.getenv("OPENROUTER_API_KEY1")
-openrouter_api_key1=os.getenv("OPENROUTER_API_KEY2")
-openrouter_api_key2=os.getenv("OPENROUTER_API_KEY3")
-if not openrouter_api_key:
-    print("WARNING: OPENROUTER_API_KEY not found in environment variables")
-    print("Set it using: export OPENROUTER_API_KEY='your-key-here'")
+    Returns:
+        The validated configuration
+    """
+    logger.info("Checking for required API keys...")
+    missing = [name for name in REQUIRED_KEYS if not os.getenv(name)]
+    if missing:
+        logger.info("\n⚠️  ERROR: Required API keys are not set!")
+        logger.info("\nPlease set the following environment variables:")
+        for name in missing:
+            source = "https://tavily.com" if name == "TAVILY_API_KEY" else "https://openrouter.ai/keys"
+            logger.info(f"- {name} - Get from {source}")
+        logger.info("\nExample (Linux/Mac):")
+        logger.info(f"export {missing[0]}='your-key-here'")
+        logger.info("\nExample (Windows):")
+        logger.info(f"set {missing[0]}=your-key-here")
+        logger.info(SEP)
+        raise SystemExit(1)
+
+    return Config(
+        tavily_key=os.getenv("TAVILY_API_KEY"),
+        openrouter_keys=tuple(os.getenv(f"OPENROUTER_API_KEY{i}") for i in range(1, 4)),
+    )
+
+# Fail fast: everything below can assume the keys are present
+config = get_config()
 
 # ===========================
 # MODEL INITIALIZATION
@@ -52,62 +117,162 @@ if not openrouter_api_key:
 # Base URL for OpenRouter
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
+OPENROUTER_HEADERS = {
+    "HTTP-Referer": "http://localhost:3000",  # Optional, for OpenRouter tracking
+    "X-Title": "Multi-LLM Hallucination Reduction System"  # Optional, for OpenRouter tracking
+}
+
+# One HTTP/2 connection pool shared by all three models, so their requests to
+# openrouter.ai multiplex over the same keep-alive connection
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+_openrouter_client = httpx.Client(http2=True, limits=HTTP_LIMITS)
+_openrouter_aclient = httpx.AsyncClient(http2=True, limits=HTTP_LIMITS)
+
+# The async client's connections belong to one event loop, so every sync entry point runs on this loop
+_loop = asyncio.new_event_loop()
+
+def run_async(coro):
+    """Run a coroutine to completion on the script's shared event loop."""
+    return _loop.run_until_complete(coro)
+
+def _close_http_clients():
+    _openrouter_client.close()
+    run_async(_openrouter_aclient.aclose())
+    _loop.close()
+
+atexit.register(_close_http_clients)
+
+def make_openrouter_llm(model: str, temperature: float, api_key: str) -> ChatOpenAI:
+    """
+    Create a chat model served through OpenRouter on the shared connection pool.
+
+    Args:
+        model: OpenRouter model ID
+        temperature: Sampling temperature
+        api_key: OpenRouter API key to bill the calls to
+
+    Returns:
+        Configured ChatOpenAI instance
+    """
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        openai_api_base=OPENROUTER_BASE_URL,
+        openai_api_key=api_key,
+        default_headers=OPENROUTER_HEADERS,
+        max_retries=0,  # _safe_invoke/_safe_stream own retries, so failures aren't retried twice
+        http_client=_openrouter_client,
+        http_async_client=_openrouter_aclient,
+    )
+
 # Generator Model - Creative but potentially hallucinatory
 # Using X.AI's Grok model via OpenRouter
-generator_llm = ChatOpenAI(
-    model="meta-llama/llama-3.3-8b-instruct:free",
+generator_llm = make_openrouter_llm(
+    "meta-llama/llama-3.3-8b-instruct:free",
     temperature=0.7,  # Higher temperature for more creative responses
-    openai_api_base=OPENROUTER_BASE_URL,
-    openai_api_key=openrouter_api_key,
-    default_headers={
-        "HTTP-Referer": "http://localhost:3000",  # Optional, for OpenRouter tracking
-        "X-Title": "Multi-LLM Hallucination Reduction System"  # Optional, for OpenRouter tracking
-    }
+    api_key=config.openrouter_keys[0],
 )
 
 # Verifier Model - Grounded and factual
 # Using DeepSeek model via OpenRouter for fact-checking
-verifier_llm = ChatOpenAI(
-    model="deepseek/deepseek-r1:free",
+verifier_llm = make_openrouter_llm(
+    "deepseek/deepseek-r1:free",
     temperature=0.2,  # Lower temperature for more factual responses
-    openai_api_base=OPENROUTER_BASE_URL,
-    openai_api_key=openrouter_api_key1,
-    default_headers={
-        "HTTP-Referer": "http://localhost:3000",
-        "X-Title": "Multi-LLM Hallucination Reduction System"
-    }
+    api_key=config.openrouter_keys[1],
 )
 
 # Comparer Model - Critical reasoner and synthesizer
 # Using Qwen Coder model via OpenRouter for synthesis
-comparer_llm = ChatOpenAI(
-    model="nvidia/nemotron-nano-9b-v2:free",
+comparer_llm = make_openrouter_llm(
+    "nvidia/nemotron-nano-9b-v2:free",
     temperature=0.2,  # Low temperature for consistent synthesis
-    openai_api_base=OPENROUTER_BASE_URL,
-    openai_api_key=openrouter_api_key2,
-    default_headers={
-        "HTTP-Referer": "http://localhost:3000",
-        "X-Title": "Multi-LLM Hallucination Reduction System"
-    }
+    api_key=config.openrouter_keys[2],
 )
 
+# ===========================
+# RETRY POLICY
+# ===========================
+
+# Transient failures worth retrying: rate limits, timeouts, dropped connections and 5xx responses
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError, httpx.HTTPStatusError)
+MAX_ATTEMPTS = 5
+MAX_RETRY_AFTER_SECS = 60
+_backoff = wait_exponential_jitter(initial=0.5, max=10)
+
+def _retry_wait(retry_state) -> float:
+    """Honor OpenRouter's Retry-After header on 429s; otherwise back off exponentially with jitter."""
+    error = retry_state.outcome.exception()
+    if isinstance(error, RateLimitError):
+        try:
+            return min(float(error.response.headers.get("retry-after")), MAX_RETRY_AFTER_SECS)
+        except (TypeError, ValueError):
+            pass
+    return _backoff(retry_state)
+
+# OpenRouter's free tier allows about 20 requests per minute per key. Each key gets a
+# token bucket, so calls go straight through while there is budget and only wait near the cap
+OPENROUTER_RPM = 20
+
+@functools.cache
+def _get_limiter(api_key: str) -> AsyncLimiter:
+    return AsyncLimiter(OPENROUTER_RPM, 60)
+
+def _limiter_for(runnable):
+    """Rate limiter for a direct OpenRouter model call (a no-op context for chains)."""
+    if isinstance(runnable, ChatOpenAI):
+        return _get_limiter(runnable.openai_api_key.get_secret_value())
+    return contextlib.nullcontext()
+
+async def _safe_invoke(chain, inp):
+    """
+    Invoke a chain or model, retrying transient failures.
+
+    Args:
+        chain: Any runnable (chain or chat model)
+        inp: Input passed to `ainvoke`
+
+    Returns:
+        The runnable's output
+    """
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        wait=_retry_wait,
+        retry=retry_if_exception_type(RETRYABLE_ERRORS),
+        reraise=True,
+    ):
+        with attempt:
+            async with _limiter_for(chain):
+                return await chain.ainvoke(inp)
+
 # ===========================
 # SEARCH TOOL INITIALIZATION
 # ===========================
 
 # Initialize Tavily search tool for retrieving real-world, up-to-date information
-try:
-    search_tool = TavilySearchResults(
-        api_key=tavily_api_key,
-        max_results=5,  # Retrieve top 5 search results for comprehensive context
-        search_depth="advanced",  # Use advanced search for better results
-        include_answer=True,  # Include direct answer if available
-        include_raw_content=False,  # Don't include raw HTML
-    )
-    print(f"✅ Tavily Search Tool initialized successfully")
-except Exception as e:
-    print(f"❌ Error initializing Tavily Search Tool: {e}")
-    search_tool = None
+@functools.cache
+def get_search_tool():
+    """
+    Create the Tavily search tool on first use.
+
+    langchain_community is slow to import, so it is only loaded once a search actually runs.
+
+    Returns:
+        The search tool, or None if it could not be initialized
+    """
+    try:
+        from langchain_community.tools.tavily_search import TavilySearchResults
+        search_tool = TavilySearchResults(
+            api_key=config.tavily_key,
+            max_results=5,  # Retrieve top 5 search results for comprehensive context
+            search_depth="advanced",  # Use advanced search for better results
+            include_answer=True,  # Include direct answer if available
+            include_raw_content=False,  # Don't include raw HTML
+        )
+        logger.info(f"✅ Tavily Search Tool initialized successfully")
+        return search_tool
+    except Exception as e:
+        logger.info(f"❌ Error initializing Tavily Search Tool: {e}")
+        return None
 
 # ===========================
 # PROMPT TEMPLATES
@@ -115,29 +280,26 @@ except Exception as e:
 
 # Generator Prompt Template
 # Simple prompt for initial answer generation
-generator_prompt_template = ChatPromptTemplate.from_template(
-    """You are a helpful AI assistant. Please answer the following query to the best of your ability:
+GENERATOR_TEMPLATE = """You are a helpful AI assistant. Please answer the following query to the best of your ability:
 
 Query: {query}
 
 Answer:"""
-)
+generator_prompt_template = ChatPromptTemplate.from_template(GENERATOR_TEMPLATE)
 
 # Verifier Prompt Template
 # Strict prompt that enforces grounding in search results only
-verifier_prompt_template = ChatPromptTemplate.from_template(
-    """You are a factual assistant. Answer the following user query based ONLY on the provided search results context. Do not use any of your internal knowledge. If the context does not contain the answer, state that you cannot answer based on the information provided.
+VERIFIER_TEMPLATE = """You are a factual assistant. Answer the following user query based ONLY on the provided search results context. Do not use any of your internal knowledge. If the context does not contain the answer, state that you cannot answer based on the information provided.
 
 Context:
 {context}
 
 Query: {query}"""
-)
+verifier_prompt_template = ChatPromptTemplate.from_template(VERIFIER_TEMPLATE)
 
 # Comparer Prompt Template
 # Comprehensive prompt for comparing and synthesizing answers
-comparer_prompt_template = ChatPromptTemplate.from_template(
-    """You are a meticulous fact-checking and synthesis agent. Your goal is to produce the most accurate and reliable answer to the user's query by comparing two different AI-generated answers.
+COMPARER_TEMPLATE = """You are a meticulous fact-checking and synthesis agent. Your goal is to produce the most accurate and reliable answer to the user's query by comparing two different AI-generated answers.
 
 Original Query: {query}
 
@@ -165,6 +327,48 @@ INSTRUCTIONS:
 6.  Present only the final, synthesized answer. Do not explain your reasoning process unless the query asks for it.
 
 Final Corrected Answer:"""
+comparer_prompt_template = ChatPromptTemplate.from_template(COMPARER_TEMPLATE)
+
+# Direct-call message builders
+# Same messages as the templates' format_messages, without LangChain's generic formatter;
+# the ChatPromptTemplate objects above are still what the LCEL chains use
+def make_generator_messages(query: str) -> List[HumanMessage]:
+    return [HumanMessage(content=GENERATOR_TEMPLATE.format(query=query))]
+
+def make_verifier_messages(query: str, context: str) -> List[HumanMessage]:
+    return [HumanMessage(content=VERIFIER_TEMPLATE.format(query=query, context=context))]
+
+def make_comparer_messages(query: str, generator_answer: str, verifier_answer: str) -> List[HumanMessage]:
+    return [HumanMessage(content=COMPARER_TEMPLATE.format(
+        query=query, generator_answer=generator_answer, verifier_answer=verifier_answer
+    ))]
+
+# Marshaled Prompt Templates
+# Several queries share one LLM call; each answer comes back in a JSON object keyed by query number
+MARSHALED_JSON_INSTRUCTION = """Respond with ONLY a JSON object that maps each query number (as a string) to its answer, for example {{"1": "...", "2": "..."}}. Do not add any text outside the JSON object."""
+
+marshaled_generator_prompt_template = ChatPromptTemplate.from_template(
+    """You are a helpful AI assistant. Please answer each of the following numbered queries to the best of your ability:
+
+{queries}
+
+""" + MARSHALED_JSON_INSTRUCTION
+)
+
+marshaled_verifier_prompt_template = ChatPromptTemplate.from_template(
+    """You are a factual assistant. Answer each of the following numbered queries based ONLY on the search results context given in its own section. Do not use any of your internal knowledge or another query's context. If a section's context does not contain the answer, state that you cannot answer based on the information provided.
+
+{sections}
+
+""" + MARSHALED_JSON_INSTRUCTION
+)
+
+marshaled_comparer_prompt_template = ChatPromptTemplate.from_template(
+    """You are a meticulous fact-checking and synthesis agent. For each numbered section below, compare the Generator Model answer (creative but potentially unreliable) against the Verifier Model answer (grounded in web search results), correct any inaccuracies or hallucinations in the Generator Model answer using the Verifier Model's facts, and write a final, comprehensive answer in Markdown. Prioritize the Verifier Model when it provides more relevant or up-to-date information.
+
+{sections}
+
+""" + MARSHALED_JSON_INSTRUCTION
 )
 
 # ===========================
@@ -184,21 +388,64 @@ def format_search_results(results: List[Dict]) -> str:
     if not results:
         return "No search results found."
     
-    formatted_results = []
+    # Write every entry into one buffer instead of joining per-result strings
+    buf = io.StringIO()
     for i, result in enumerate(results, 1):
-        # Extract relevant fields from search result
-        content = result.get('content', 'No content available')
-        url = result.get('url', 'No URL')
-        title = result.get('title', 'No title')
-        
-        formatted_results.append(
+        if i > 1:
+            buf.write("\n")
+        buf.write(
             f"Result {i}:\n"
-            f"Title: {title}\n"
-            f"URL: {url}\n"
-            f"Content: {content}\n"
+            f"Title: {result.get('title', 'No title')}\n"
+            f"URL: {result.get('url', 'No URL')}\n"
+            f"Content: {result.get('content', 'No content available')}\n"
         )
     
-    return "\n".join(formatted_results)
+    return buf.getvalue()
+
+# ===========================
+# SEARCH CACHE
+# ===========================
+
+# Tavily results keyed by normalized query; the disk layer lets repeated runs skip the search too
+SEARCH_CACHE_TTL = 3600
+SEARCH_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tavily_cache")
+_search_cache = TTLCache(maxsize=1024, ttl=SEARCH_CACHE_TTL)
+_search_cache_stats = {"hits": 0, "misses": 0}
+
+def search_cache_hit_rate() -> float:
+    """Fraction of searches this session that were served from the cache."""
+    total = _search_cache_stats["hits"] + _search_cache_stats["misses"]
+    return _search_cache_stats["hits"] / total if total else 0.0
+
+def _search_cache_key(query: str) -> str:
+    return hashlib.sha256(query.lower().strip().encode("utf-8")).hexdigest()
+
+def _get_cached_search(query: str) -> Optional[List[Dict]]:
+    """Return cached results for the query (memory first, then disk), counting the hit or miss."""
+    key = _search_cache_key(query)
+    results = _search_cache.get(key)
+    if results is None:
+        path = os.path.join(SEARCH_CACHE_DIR, f"{key}.json")
+        try:
+            if time.time() - os.path.getmtime(path) <= SEARCH_CACHE_TTL:
+                with open(path, "r", encoding="utf-8") as f:
+                    results = json.load(f)
+                _search_cache[key] = results
+        except (OSError, ValueError):
+            pass
+
+    _search_cache_stats["hits" if results is not None else "misses"] += 1
+    return results
+
+def _store_search(query: str, results: List[Dict]):
+    key = _search_cache_key(query)
+    _search_cache[key] = results
+    try:
+        os.makedirs(SEARCH_CACHE_DIR, exist_ok=True)
+        with open(os.path.join(SEARCH_CACHE_DIR, f"{key}.json"), "w", encoding="utf-8") as f:
+            json.dump(results, f)
+    except (OSError, TypeError):
+        pass
 
 def search_and_format(query: str) -> Dict[str, str]:
     """
@@ -210,18 +457,24 @@ def search_and_format(query: str) -> Dict[str, str]:
     Returns:
         Dictionary with query and formatted context
     """
+    search_tool = get_search_tool()
     if search_tool is None:
-        print("⚠️  Search tool not initialized. Using fallback context.")
+        logger.info("⚠️  Search tool not initialized. Using fallback context.")
         return {
             "query": query,
             "context": "Search functionality is not available. Please verify your Tavily API key."
         }
     
     try:
-        print(f"🔍 Searching for: {query}")
-        # Perform search
-        search_results = search_tool.invoke(query)
-        print(f"✅ Found {len(search_results)} search results")
+        search_results = _get_cached_search(query)
+        if search_results is not None:
+            logger.info(f"♻️  Using cached search results for: {query}")
+        else:
+            logger.info(f"🔍 Searching for: {query}")
+            # Perform search
+            search_results = search_tool.invoke(query)
+            _store_search(query, search_results)
+            logger.info(f"✅ Found {len(search_results)} search results")
         
         # Format results
         context = format_search_results(search_results)
@@ -231,8 +484,48 @@ def search_and_format(query: str) -> Dict[str, str]:
             "context": context
         }
     except Exception as e:
-        print(f"❌ Search error: {e}")
-        print(f"   Query was: {query}")
+        logger.info(f"❌ Search error: {e}")
+        logger.info(f"   Query was: {query}")
+        return {
+            "query": query,
+            "context": f"Error performing search: {str(e)}. No context available."
+        }
+
+async def asearch_and_format(query: str) -> Dict[str, str]:
+    """
+    Async version of `search_and_format`, so the search overlaps the generator on the event loop.
+    
+    Args:
+        query: The search query
+    
+    Returns:
+        Dictionary with query and formatted context
+    """
+    search_tool = get_search_tool()
+    if search_tool is None:
+        logger.info("⚠️  Search tool not initialized. Using fallback context.")
+        return {
+            "query": query,
+            "context": "Search functionality is not available. Please verify your Tavily API key."
+        }
+    
+    try:
+        search_results = _get_cached_search(query)
+        if search_results is not None:
+            logger.info(f"♻️  Using cached search results for: {query}")
+        else:
+            logger.info(f"🔍 Searching for: {query}")
+            search_results = await search_tool.ainvoke(query)
+            _store_search(query, search_results)
+            logger.info(f"✅ Found {len(search_results)} search results")
+        
+        return {
+            "query": query,
+            "context": format_search_results(search_results)
+        }
+    except Exception as e:
+        logger.info(f"❌ Search error: {e}")
+        logger.info(f"   Query was: {query}")
         return {
             "query": query,
             "context": f"Error performing search: {str(e)}. No context available."
@@ -255,7 +548,8 @@ generator_chain = (
 # Searches for factual information and generates a grounded answer using DeepSeek
 
 # Create a runnable lambda for search and format
-search_runnable = RunnableLambda(search_and_format)
+# (async invocations use the native async search instead of a worker thread)
+search_runnable = RunnableLambda(search_and_format, afunc=asearch_and_format)
 
 # Verifier chain that uses search results to generate grounded answer
 verifier_chain = (
@@ -278,7 +572,9 @@ comparer_chain = (
 # ===========================
 
 # Complete system chain using LangChain Expression Language
-# This orchestrates the entire "Generate, Verify, Compare" flow
+# This orchestrates the entire "Generate, Verify, Compare" flow and returns
+# {"query", "generator_answer", "verifier_answer", "final"} so callers can
+# show the intermediate answers without running those chains again
 complete_system = (
     # Step 1: Run Generator and Verifier in parallel
     RunnableParallel(
@@ -286,135 +582,339 @@ complete_system = (
         generator_answer=generator_chain,
         verifier_answer=verifier_chain,
     )
-    # Step 2: Pass all results to the Comparer
-    | comparer_chain
+    # Step 2: Pass all results to the Comparer, keeping them in the output
+    | RunnablePassthrough.assign(final=comparer_chain)
 )
 
 # ===========================
 # MAIN UTILITY FUNCTION
 # ===========================
 
-def run_hallucination_reduction_system(query: str, verbose: bool = True) -> str:
+async def collect_stream(stream, echo: bool = False) -> str:
     """
-    Run the complete hallucination reduction system on a given query.
-    
+    Drain a chain's token stream into a single string.
+
+    Args:
+        stream: Async iterator of text chunks from `chain.astream(...)`
+        echo: If True, write each chunk to stdout as soon as it arrives
+
+    Returns:
+        The full concatenated output
+    """
+    chunks = []
+    async for chunk in stream:
+        chunks.append(chunk)
+        if echo:
+            sys.stdout.write(chunk)
+            sys.stdout.flush()
+    return "".join(chunks)
+
+async def _safe_stream(chain, inp, echo: bool = False) -> str:
+    """
+    Stream a chain into a single string, retrying transient failures until the first chunk arrives.
+
+    Once a chunk has been echoed a retry would print it twice, so later failures propagate.
+
+    Args:
+        chain: Any runnable (chain or chat model)
+        inp: Input passed to `astream`
+        echo: If True, write each chunk to stdout as soon as it arrives
+
+    Returns:
+        The full concatenated output
+    """
+    started = False
+
+    async def stream():
+        nonlocal started
+        async for chunk in chain.astream(inp):
+            started = True
+            yield chunk
+
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        wait=_retry_wait,
+        retry=retry_if_exception(lambda e: not started and isinstance(e, RETRYABLE_ERRORS)),
+        reraise=True,
+    ):
+        with attempt:
+            async with _limiter_for(chain):
+                return await collect_stream(stream(), echo=echo)
+
+async def arun_hallucination_reduction_system(query: str, verbose: bool = True) -> str:
+    """
+    Async version of `run_hallucination_reduction_system` that streams output as it is generated.
+
     Args:
         query: The user's question or query
-        verbose: If True, print intermediate results for debugging
-    
+        verbose: If True, stream intermediate results for debugging
+
     Returns:
         The final, fact-checked and synthesized answer
     """
     if verbose:
-        print("="*80)
-        print(f"QUERY: {query}")
-        print("="*80)
-        
-        # Run generator independently for verbose output
-        print("\n[1] GENERATOR OUTPUT (Grok-4-fast):")
-        print("-"*40)
+        logger.info(SEP)
+        logger.info(f"QUERY: {query}")
+        logger.info(SEP)
+
+        # The verifier fills a buffer in the background while the generator streams to the terminal
+        verifier_task = asyncio.create_task(_safe_invoke(verifier_chain, query))
+
+        logger.info("\n[1] GENERATOR OUTPUT (Grok-4-fast):")
+        logger.info(RULE)
         try:
-            generator_result = generator_chain.invoke(query)
-            print(generator_result)
+            generator_result = await _safe_stream(generator_chain, query, echo=True)
+            logger.info("")
         except Exception as e:
-            print(f"Generator error: {e}")
+            logger.info(f"Generator error: {e}")
             generator_result = "Error generating initial answer."
-        
-        # Run verifier independently for verbose output
-        print("\n[2] VERIFIER OUTPUT (DeepSeek with Search Results):")
-        print("-"*40)
+
+        logger.info("\n[2] VERIFIER OUTPUT (DeepSeek with Search Results):")
+        logger.info(RULE)
         try:
-            verifier_result = verifier_chain.invoke(query)
-            print(verifier_result)
+            verifier_result = await verifier_task
+            logger.info(verifier_result)
         except Exception as e:
-            print(f"Verifier error: {e}")
+            logger.info(f"Verifier error: {e}")
             verifier_result = "Error verifying with search results."
-        
-        # Run the complete system
-        print("\n[3] FINAL SYNTHESIZED OUTPUT (Meta Llama-3.2):")
-        print("-"*40)
-    
+
+        # The comparer reuses the answers printed above instead of rerunning both chains
+        logger.info("\n[3] FINAL SYNTHESIZED OUTPUT (Meta Llama-3.2):")
+        logger.info(RULE)
+
     try:
-        # Run the complete system
-        final_answer = complete_system.invoke(query)
-        
         if verbose:
-            print(final_answer)
-            print("="*80)
-        
+            final_answer = await _safe_stream(comparer_chain, {
+                "query": query,
+                "generator_answer": generator_result,
+                "verifier_answer": verifier_result,
+            }, echo=True)
+            logger.info("")
+            logger.info(f"Search cache hit rate: {search_cache_hit_rate():.0%} "
+                        f"({_search_cache_stats['hits']} hits, {_search_cache_stats['misses']} misses)")
+            logger.info(SEP)
+        else:
+            final_answer = (await _safe_invoke(complete_system, query))["final"]
+
         return final_answer
     except Exception as e:
         error_msg = f"System error: {e}"
         if verbose:
-            print(error_msg)
-            print("="*80)
+            logger.info(error_msg)
+            logger.info(SEP)
         return error_msg
 
+def run_hallucination_reduction_system(query: str, verbose: bool = True) -> str:
+    """
+    Run the complete hallucination reduction system on a given query.
+    
+    Args:
+        query: The user's question or query
+        verbose: If True, print intermediate results for debugging
+    
+    Returns:
+        The final, fact-checked and synthesized answer
+    """
+    return run_async(arun_hallucination_reduction_system(query, verbose))
+
+# ===========================
+# BATCH EXECUTION (ROW MARSHALING)
+# ===========================
+
+# Queries per marshaled LLM call; tune empirically, larger batches risk truncated or malformed JSON
+MARSHAL_SIZE = 3
+
+def parse_marshaled_answers(text: str, count: int) -> Optional[List[str]]:
+    """
+    Parse a marshaled response into one answer per query.
+
+    Args:
+        text: Raw LLM output expected to contain a JSON object keyed "1".."count"
+        count: Number of queries in the marshaled prompt
+
+    Returns:
+        The answers in query order, or None if the response is not valid
+    """
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        answers = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(answers, dict):
+        return None
+    keys = [str(i) for i in range(1, count + 1)]
+    if not all(isinstance(answers.get(key), str) and answers[key].strip() for key in keys):
+        return None
+    return [answers[key] for key in keys]
+
+async def _amarshaled_call(llm, prompt_template, count: int, **variables) -> Optional[List[str]]:
+    """Invoke one marshaled prompt; None means the caller should fall back to per-query calls."""
+    try:
+        response = await _safe_invoke(llm, prompt_template.format_messages(**variables))
+    except Exception as e:
+        logger.info(f"Marshaled call error: {e}")
+        return None
+    return parse_marshaled_answers(response.content, count)
+
+async def _arun_marshaled_group(queries: List[str]) -> List[str]:
+    """Run one group of queries through generate, verify and compare with one LLM call per stage."""
+    count = len(queries)
+
+    # Search doesn't batch, so each query still gets its own Tavily call
+    search_task = asyncio.gather(*(asearch_and_format(q) for q in queries))
+    generator_task = asyncio.create_task(_amarshaled_call(
+        generator_llm, marshaled_generator_prompt_template, count,
+        queries="\n".join(f"{i}. {q}" for i, q in enumerate(queries, 1)),
+    ))
+    contexts = [result["context"] for result in await search_task]
+
+    verifier_answers = await _amarshaled_call(
+        verifier_llm, marshaled_verifier_prompt_template, count,
+        sections="\n\n".join(
+            f"=== QUERY {i} ===\nQuery: {q}\n\nContext:\n{context}"
+            for i, (q, context) in enumerate(zip(queries, contexts), 1)
+        ),
+    )
+    if verifier_answers is None:
+        logger.info("⚠️  Marshaled verifier response invalid; verifying per query")
+        verifier_answers = await asyncio.gather(*(
+            _safe_invoke(verifier_prompt_template | verifier_llm | StrOutputParser(), {"query": q, "context": context})
+            for q, context in zip(queries, contexts)
+        ))
+
+    generator_answers = await generator_task
+    if generator_answers is None:
+        logger.info("⚠️  Marshaled generator response invalid; generating per query")
+        generator_answers = await asyncio.gather(*(_safe_invoke(generator_chain, q) for q in queries))
+
+    final_answers = await _amarshaled_call(
+        comparer_llm, marshaled_comparer_prompt_template, count,
+        sections="\n\n".join(
+            f"=== QUERY {i} ===\nQuery: {q}\n\nGenerator Model:\n{gen}\n\nVerifier Model:\n{ver}"
+            for i, (q, gen, ver) in enumerate(zip(queries, generator_answers, verifier_answers), 1)
+        ),
+    )
+    if final_answers is None:
+        logger.info("⚠️  Marshaled comparer response invalid; comparing per query")
+        final_answers = await asyncio.gather(*(
+            _safe_invoke(comparer_chain, {"query": q, "generator_answer": gen, "verifier_answer": ver})
+            for q, gen, ver in zip(queries, generator_answers, verifier_answers)
+        ))
+    return final_answers
+
+async def abatch_run(queries: List[str], marshal_size: int = MARSHAL_SIZE) -> List[str]:
+    """
+    Async version of `batch_run`.
+
+    Args:
+        queries: Independent queries to answer
+        marshal_size: Number of queries packed into each LLM call
+
+    Returns:
+        The final answers, in the same order as `queries`
+    """
+    results = []
+    for start in range(0, len(queries), marshal_size):
+        group = queries[start:start + marshal_size]
+        try:
+            results.extend(await _arun_marshaled_group(group))
+        except Exception as e:
+            results.extend([f"System error: {e}"] * len(group))
+    return results
+
+def batch_run(queries: List[str], marshal_size: int = MARSHAL_SIZE) -> List[str]:
+    """
+    Answer many queries, packing `marshal_size` of them into each generator, verifier and comparer call.
+
+    Under free-tier rate limits the number of LLM calls, not their size, is the bottleneck,
+    so marshaling cuts the call count by roughly `marshal_size`x. Any stage whose JSON
+    response does not parse falls back to one call per query.
+
+    Args:
+        queries: Independent queries to answer
+        marshal_size: Number of queries packed into each LLM call
+
+    Returns:
+        The final answers, in the same order as `queries`
+    """
+    return run_async(abatch_run(queries, marshal_size))
+
 # ===========================
 # TESTING FUNCTION
 # ===========================
 
-def test_individual_models(query: str = "What is the capital of France?"):
+async def atest_individual_models(query: str = "What is the capital of France?"):
     """
-    Test each model individually to ensure they're working properly.
+    Async version of `test_individual_models`.
     
     Args:
         query: Simple test query
     """
-    print("\n" + "="*80)
-    print("TESTING INDIVIDUAL MODELS")
-    print("="*80)
+    logger.info("\n" + SEP)
+    logger.info("TESTING INDIVIDUAL MODELS")
+    logger.info(SEP)
     
     # Test Search Tool
-    print("\nTesting Search Tool...")
+    logger.info("\nTesting Search Tool...")
     try:
+        search_tool = get_search_tool()
         if search_tool:
-            results = search_tool.invoke(query)
-            print(f"✅ Search tool working: Found {len(results)} results")
+            results = await search_tool.ainvoke(query)
+            logger.info(f"✅ Search tool working: Found {len(results)} results")
         else:
-            print("❌ Search tool not initialized")
+            logger.info("❌ Search tool not initialized")
     except Exception as e:
-        print(f"❌ Search tool error: {e}")
+        logger.info(f"❌ Search tool error: {e}")
     
     # Test Generator
-    print("\nTesting Generator (Grok-4-fast)...")
+    logger.info("\nTesting Generator (Grok-4-fast)...")
     try:
-        test_prompt = generator_prompt_template.format_messages(query=query)
-        response = generator_llm.invoke(test_prompt)
-        print(f"✅ Generator working: {response.content[:100]}...")
+        test_prompt = make_generator_messages(query)
+        async with _limiter_for(generator_llm):
+            response = await generator_llm.ainvoke(test_prompt)
+        logger.info(f"✅ Generator working: {response.content[:100]}...")
     except Exception as e:
-        print(f"❌ Generator error: {e}")
-    
-    time.sleep(1)  # Avoid rate limits
+        logger.info(f"❌ Generator error: {e}")
     
     # Test Verifier
-    print("\nTesting Verifier (DeepSeek)...")
+    logger.info("\nTesting Verifier (DeepSeek)...")
     try:
-        test_prompt = verifier_prompt_template.format_messages(
-            query=query, 
+        test_prompt = make_verifier_messages(
+            query=query,
             context="France is a country in Europe. Its capital city is Paris."
         )
-        response = verifier_llm.invoke(test_prompt)
-        print(f"✅ Verifier working: {response.content[:100]}...")
+        async with _limiter_for(verifier_llm):
+            response = await verifier_llm.ainvoke(test_prompt)
+        logger.info(f"✅ Verifier working: {response.content[:100]}...")
     except Exception as e:
-        print(f"❌ Verifier error: {e}")
-    
-    time.sleep(1)  # Avoid rate limits
+        logger.info(f"❌ Verifier error: {e}")
     
     # Test Comparer
-    print("\nTesting Comparer (Meta Llama-3.2)...")
+    logger.info("\nTesting Comparer (Meta Llama-3.2)...")
     try:
-        test_prompt = comparer_prompt_template.format_messages(
+        test_prompt = make_comparer_messages(
             query=query,
             generator_answer="The capital of France is Paris.",
             verifier_answer="Based on the search results, the capital of France is Paris."
         )
-        response = comparer_llm.invoke(test_prompt)
-        print(f"✅ Comparer working: {response.content[:100]}...")
+        async with _limiter_for(comparer_llm):
+            response = await comparer_llm.ainvoke(test_prompt)
+        logger.info(f"✅ Comparer working: {response.content[:100]}...")
     except Exception as e:
-        print(f"❌ Comparer error: {e}")
+        logger.info(f"❌ Comparer error: {e}")
     
-    print("="*80)
+    logger.info(SEP)
+
+def test_individual_models(query: str = "What is the capital of France?"):
+    """
+    Test each model individually to ensure they're working properly.
+    
+    Args:
+        query: Simple test query
+    """
+    run_async(atest_individual_models(query))
 
 # ===========================
 # MAIN EXECUTION BLOCK
@@ -433,65 +933,58 @@ if __name__ == "__main__":
     ]
     
     # Run the system with an example query
-    print("\n" + "="*80)
-    print("MULTI-LLM HALLUCINATION REDUCTION SYSTEM (via OpenRouter)")
-    print("="*80)
-    print("\nUsing models:")
-    print("- Generator: x-ai/grok-4-fast:free")
-    print("- Verifier: deepseek/deepseek-chat-v3.1:free")
-    print("- Comparer: qwen/qwen3-coder:free")
-    print("="*80)
+    logger.info("\n" + SEP)
+    logger.info("MULTI-LLM HALLUCINATION REDUCTION SYSTEM (via OpenRouter)")
+    logger.info(SEP)
+    logger.info("\nUsing models:")
+    logger.info("- Generator: x-ai/grok-4-fast:free")
+    logger.info("- Verifier: deepseek/deepseek-chat-v3.1:free")
+    logger.info("- Comparer: qwen/qwen3-coder:free")
+    logger.info(SEP)
     
-    # Check if API keys are set
-    if not tavily_api_key or not openrouter_api_key:
-        print("\n⚠️  ERROR: Required API keys are not set!")
-        print("\nPlease set the following environment variables:")
-        print("1. TAVILY_API_KEY - Get from https://tavily.com")
-        print("2. OPENROUTER_API_KEY - Get from https://openrouter.ai/keys")
-        print("\nExample (Linux/Mac):")
-        print("export TAVILY_API_KEY='your-tavily-key'")
-        print("export OPENROUTER_API_KEY='your-openrouter-key'")
-        print("\nExample (Windows):")
-        print("set TAVILY_API_KEY=your-tavily-key")
-        print("set OPENROUTER_API_KEY=your-openrouter-key")
-        print("="*80)
-    else:
-        # Optional: Test individual models first
-        print("\nDo you want to test individual models first? (y/n): ", end="")
-        test_choice = input().strip().lower()
-        if test_choice == 'y':
-            test_individual_models()
+    # Optional: Test individual models first
+    test_choice = input("\nDo you want to test individual models first? (y/n): ").strip().lower()
+    if test_choice == 'y':
+        test_individual_models()
+
+    # Optional: Answer every example query in marshaled batches
+    if input("\nDo you want to run all example queries as a batch first? (y/n): ").strip().lower() == 'y':
+        for q, answer in zip(example_queries, batch_run(example_queries)):
+            logger.info("\n" + SEP)
+            logger.info(f"QUERY: {q}")
+            logger.info(RULE)
+            logger.info(answer)
+        logger.info(SEP)
+    
+    # Select a query (using your F1 example)
+    test_query = input("Enter the query: ") # "Compare F1 standings 2024 and 2023"
+    
+    try:
+        # Run the complete system with verbose output
+        final_answer = run_hallucination_reduction_system(test_query, verbose=True)
         
-        # Select a query (using your F1 example)
-        test_query = input("Enter the query: ") # "Compare F1 standings 2024 and 2023"
+        logger.info("\n" + SEP)
+        logger.info("SYSTEM EXECUTION COMPLETED SUCCESSFULLY")
+        logger.info(SEP)
         
-        try:
-            # Run the complete system with verbose output
-            final_answer = run_hallucination_reduction_system(test_query, verbose=True)
-            
-            print("\n" + "="*80)
-            print("SYSTEM EXECUTION COMPLETED SUCCESSFULLY")
-            print("="*80)
-            
-            # Optional: Test with another query
-            print("\n\nWould you like to test with another query? Here are some options:")
-            for i, q in enumerate(example_queries, 1):
-                print(f"{i}. {q}")
-            print("\nEnter number (1-6) or 'q' to quit: ", end="")
-            choice = input().strip()
-            
-            if choice.isdigit() and 1 <= int(choice) <= len(example_queries):
-                selected_query = example_queries[int(choice) - 1]
-                print(f"\nRunning with: {selected_query}")
-                run_hallucination_reduction_system(selected_query, verbose=True)
-            
-        except Exception as e:
-            print(f"\nError occurred: {e}")
-            print("\nTroubleshooting tips:")
-            print("1. Verify your OpenRouter API key is valid")
-            print("2. Check if you have credits/quota on OpenRouter")
-            print("3. Verify your Tavily API key is valid")
-            print("4. Ensure you have installed required packages:")
-            print("   pip install langchain langchain-community langchain-openai tavily-python")
-            print("5. Check your internet connection")
-            print("\nYou can test individual models using the test function to isolate issues.")
\ No newline at end of file
+        # Optional: Test with another query
+        logger.info("\n\nWould you like to test with another query? Here are some options:")
+        for i, q in enumerate(example_queries, 1):
+            logger.info(f"{i}. {q}")
+        choice = input("\nEnter number (1-6) or 'q' to quit: ").strip()
+        
+        if choice.isdigit() and 1 <= int(choice) <= len(example_queries):
+            selected_query = example_queries[int(choice) - 1]
+            logger.info(f"\nRunning with: {selected_query}")
+            run_hallucination_reduction_system(selected_query, verbose=True)
+        
+    except Exception as e:
+        logger.info(f"\nError occurred: {e}")
+        logger.info("\nTroubleshooting tips:")
+        logger.info("1. Verify your OpenRouter API key is valid")
+        logger.info("2. Check if you have credits/quota on OpenRouter")
+        logger.info("3. Verify your Tavily API key is valid")
+        logger.info("4. Ensure you have installed required packages:")
+        logger.info("   pip install langchain langchain-community langchain-openai tavily-python")
+        logger.info("5. Check your internet connection")
+        logger.info("\nYou can test individual models using the test function to isolate issues.")
\ No newline at end of file
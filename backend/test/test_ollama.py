@@ -4,21 +4,44 @@ Test script for Llama 3.2 model using Ollama
 This script tests various capabilities of the llama3.2:latest model
 """
 
-import requests
-import json
+import asyncio
 import time
+from typing import Optional
+
+import httpx
+import orjson
 
 # Ollama API endpoint
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "llama3.2:latest"
 
-def test_ollama_connection():
+# One pooled client for the whole run so every prompt reuses the same keep-alive connection
+_client: Optional[httpx.AsyncClient] = None
+
+def get_client() -> httpx.AsyncClient:
+    """Create the shared HTTP client on first use"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=32, keepalive_expiry=60),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+        )
+    return _client
+
+async def close_client():
+    """Close the shared HTTP client"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def test_ollama_connection():
     """Test if Ollama is running and accessible"""
     try:
-        response = requests.get("http://localhost:11434/api/tags")
+        response = await get_client().get("http://localhost:11434/api/tags")
         if response.status_code == 200:
             print("✓ Ollama is running")
-            models = response.json().get('models', [])
+            models = orjson.loads(response.content).get('models', [])
             model_names = [m['name'] for m in models]
             if MODEL_NAME in model_names:
                 print(f"✓ {MODEL_NAME} is available")
@@ -34,7 +57,7 @@ def test_ollama_connection():
         print("  Make sure Ollama is running (try: ollama serve)")
         return False
 
-def generate_response(prompt, stream=False):
+async def generate_response(prompt, stream=False):
     """Generate a response from the Llama model"""
     data = {
         "model": MODEL_NAME,
@@ -43,26 +66,26 @@ def generate_response(prompt, stream=False):
     }
     
     try:
-        response = requests.post(OLLAMA_URL, json=data, stream=stream)
-        
         if stream:
             full_response = ""
-            for line in response.iter_lines():
-                if line:
-                    json_response = json.loads(line)
-                    if 'response' in json_response:
-                        full_response += json_response['response']
-                        print(json_response['response'], end='', flush=True)
+            async with get_client().stream("POST", OLLAMA_URL, json=data) as response:
+                async for line in response.aiter_lines():
+                    if line:
+                        json_response = orjson.loads(line)
+                        if 'response' in json_response:
+                            full_response += json_response['response']
+                            print(json_response['response'], end='', flush=True)
             print()  # New line after streaming
             return full_response
         else:
-            result = response.json()
+            response = await get_client().post(OLLAMA_URL, json=data)
+            result = orjson.loads(response.content)
             return result.get('response', '')
     except Exception as e:
         print(f"Error generating response: {e}")
         return None
 
-def run_tests():
+async def run_tests():
     """Run a series of tests on the Llama model"""
     
     print("\n" + "="*60)
@@ -70,7 +93,7 @@ def run_tests():
     print("="*60 + "\n")
     
     # Check connection first
-    if not test_ollama_connection():
+    if not await test_ollama_connection():
         return
     
     tests = [
@@ -96,27 +119,36 @@ def run_tests():
         },
     ]
     
-    for i, test in enumerate(tests, 1):
+    async def timed_response(prompt):
+        start_time = time.perf_counter()
+        response = await generate_response(prompt)
+        return response, time.perf_counter() - start_time
+
+    # The prompts are independent, so send them all at once and report in order;
+    # interleaved streams would be unreadable, so responses are not streamed here
+    print(f"Running {len(tests)} tests concurrently...")
+    suite_start = time.perf_counter()
+    results = await asyncio.gather(*(timed_response(test['prompt']) for test in tests))
+    suite_time = time.perf_counter() - suite_start
+    
+    for i, (test, (response, elapsed)) in enumerate(zip(tests, results), 1):
         print(f"\n{'='*60}")
         print(f"Test {i}: {test['name']}")
         print(f"{'='*60}")
         print(f"Prompt: {test['prompt']}\n")
         
-        start_time = time.time()
-        response = generate_response(test['prompt'], stream=True)
-        end_time = time.time()
-        
         if response:
-            print(f"\n⏱️  Time taken: {end_time - start_time:.2f} seconds")
+            print(response)
+            print(f"\n⏱️  Time taken: {elapsed:.2f} seconds")
             print(f"📝 Response length: {len(response)} characters")
         else:
             print("✗ Failed to get response")
     
     print("\n" + "="*60)
-    print("TESTS COMPLETED")
+    print(f"TESTS COMPLETED in {suite_time:.2f} seconds")
     print("="*60 + "\n")
 
-def interactive_mode():
+async def interactive_mode():
     """Run interactive chat with the model"""
     print("\n" + "="*60)
     print("INTERACTIVE MODE")
@@ -134,20 +166,26 @@ def interactive_mode():
                 continue
             
             print("\nLlama: ", end='', flush=True)
-            generate_response(user_input, stream=True)
+            await generate_response(user_input, stream=True)
             print()
             
         except KeyboardInterrupt:
             print("\n\nGoodbye!")
             break
 
+async def main(interactive: bool):
+    try:
+        if interactive:
+            if await test_ollama_connection():
+                await interactive_mode()
+        else:
+            await run_tests()
+
+            print("\nTo run in interactive mode, use: python test_llama3.2.py --interactive")
+    finally:
+        await close_client()
+
 if __name__ == "__main__":
     import sys
-    
-    if len(sys.argv) > 1 and sys.argv[1] == "--interactive":
-        if test_ollama_connection():
-            interactive_mode()
-    else:
-        run_tests()
-        
-        print("\nTo run in interactive mode, use: python test_llama3.2.py --interactive")
\ No newline at end of file
+
+    asyncio.run(main(len(sys.argv) > 1 and sys.argv[1] == "--interactive"))
\ No newline at end of file
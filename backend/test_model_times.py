@@ -5,6 +5,7 @@ Tests the response time of each model in the TrueSynth system.
 """
 
 import time
+import asyncio
 from llm_system import (
     generator_llm,
     verifier_llm,
@@ -12,115 +13,77 @@ from llm_system import (
     generator_prompt_template,
     verifier_prompt_template,
     comparer_prompt_template,
-    search_tool
+    search_tool,
+    get_llm_cache_stats
 )
 
-def test_model_times(query: str = "What is the capital of France?"):
-    """Test response times for each model."""
+def _preview(text: str) -> str:
+    return text[:150] + "..." if len(text) > 150 else text
+
+async def _time_probe(name: str, label: str, model, make_call) -> dict:
+    """Run one probe, print its outcome as soon as it finishes, and return its result entry."""
+    if not model:
+        print(f"[WARN] {label} not initialized")
+        return {'time': None, 'status': 'not_initialized'}
+    try:
+        start_time = time.perf_counter()
+        result = await make_call()
+        elapsed = time.perf_counter() - start_time
+    except Exception as e:
+        print(f"[ERROR] {label} Error: {e}")
+        return {'time': None, 'status': 'error', 'error': str(e)}
+
+    if name == 'search':
+        print(f"[OK] {label}: {elapsed:.2f}s ({len(result)} results)")
+        return {'time': elapsed, 'status': 'success', 'result_count': len(result)}
+    print(f"[OK] {label}: {elapsed:.2f}s")
+    return {'time': elapsed, 'status': 'success', 'preview': _preview(result.content)}
+
+async def atest_model_times(query: str = "What is the capital of France?"):
+    """Test response times for each model (all probes run concurrently)."""
     
     print("=" * 60)
     print("TrueSynth Model Response Time Test")
     print("=" * 60)
     print(f"\nTest Query: {query}\n")
     
-    results = {}
-    
-    # Test Generator Model (Local Ollama deepseek-r1:1.5b)
-    print("-" * 40)
-    print("Testing Generator Model (deepseek-r1:1.5b via Ollama)...")
-    if generator_llm:
-        try:
-            start_time = time.time()
-            test_prompt = generator_prompt_template.format_messages(query=query)
-            response = generator_llm.invoke(test_prompt)
-            end_time = time.time()
-            elapsed = end_time - start_time
-            results['generator'] = {
-                'time': elapsed,
-                'status': 'success',
-                'preview': response.content[:150] + "..." if len(response.content) > 150 else response.content
-            }
-            print(f"[OK] Generator: {elapsed:.2f}s")
-        except Exception as e:
-            results['generator'] = {'time': None, 'status': 'error', 'error': str(e)}
-            print(f"[ERROR] Generator Error: {e}")
-    else:
-        results['generator'] = {'time': None, 'status': 'not_initialized'}
-        print("[WARN] Generator not initialized")
+    # Include context for verifier
+    context = "France is a country in Western Europe. Paris is the capital and largest city of France."
     
-    # Test Verifier Model (deepseek-r1-0528 via OpenRouter)
-    print("-" * 40)
-    print("Testing Verifier Model (deepseek-r1-0528 via OpenRouter)...")
-    if verifier_llm:
-        try:
-            # Include context for verifier
-            context = "France is a country in Western Europe. Paris is the capital and largest city of France."
-            start_time = time.time()
-            test_prompt = verifier_prompt_template.format_messages(query=query, context=context)
-            response = verifier_llm.invoke(test_prompt)
-            end_time = time.time()
-            elapsed = end_time - start_time
-            results['verifier'] = {
-                'time': elapsed,
-                'status': 'success',
-                'preview': response.content[:150] + "..." if len(response.content) > 150 else response.content
-            }
-            print(f"[OK] Verifier: {elapsed:.2f}s")
-        except Exception as e:
-            results['verifier'] = {'time': None, 'status': 'error', 'error': str(e)}
-            print(f"[ERROR] Verifier Error: {e}")
-    else:
-        results['verifier'] = {'time': None, 'status': 'not_initialized'}
-        print("[WARN] Verifier not initialized")
-    
-    # Test Comparer Model (nemotron-nano-9b via OpenRouter)
-    print("-" * 40)
-    print("Testing Comparer Model (nemotron-nano-9b via OpenRouter)...")
-    if comparer_llm:
-        try:
-            start_time = time.time()
-            test_prompt = comparer_prompt_template.format_messages(
+    probes = {
+        # Generator Model (Local Ollama)
+        'generator': ("Generator", generator_llm, lambda: generator_llm.ainvoke(
+            generator_prompt_template.format_messages(query=query)
+        )),
+        # Verifier Model (via OpenRouter)
+        'verifier': ("Verifier", verifier_llm, lambda: verifier_llm.ainvoke(
+            verifier_prompt_template.invoke({
+                "query": query,
+                "context": context,
+                "generator_answer": "The capital of France is Paris."
+            })
+        )),
+        # Comparer Model (via OpenRouter)
+        'comparer': ("Comparer", comparer_llm, lambda: comparer_llm.ainvoke(
+            comparer_prompt_template.format_messages(
                 query=query,
                 generator_answer="The capital of France is Paris, a beautiful city known for the Eiffel Tower.",
                 verifier_answer="Based on the search results, Paris is confirmed as the capital of France."
             )
-            response = comparer_llm.invoke(test_prompt)
-            end_time = time.time()
-            elapsed = end_time - start_time
-            results['comparer'] = {
-                'time': elapsed,
-                'status': 'success',
-                'preview': response.content[:150] + "..." if len(response.content) > 150 else response.content
-            }
-            print(f"[OK] Comparer: {elapsed:.2f}s")
-        except Exception as e:
-            results['comparer'] = {'time': None, 'status': 'error', 'error': str(e)}
-            print(f"[ERROR] Comparer Error: {e}")
-    else:
-        results['comparer'] = {'time': None, 'status': 'not_initialized'}
-        print("[WARN] Comparer not initialized")
+        )),
+        # Tavily Search Tool
+        'search': ("Search", search_tool, lambda: search_tool.ainvoke(query)),
+    }
     
-    # Test Search Tool
     print("-" * 40)
-    print("Testing Tavily Search Tool...")
-    if search_tool:
-        try:
-            start_time = time.time()
-            search_results = search_tool.invoke(query)
-            end_time = time.time()
-            elapsed = end_time - start_time
-            results['search'] = {
-                'time': elapsed,
-                'status': 'success',
-                'result_count': len(search_results)
-            }
-            print(f"[OK] Search: {elapsed:.2f}s ({len(search_results)} results)")
-        except Exception as e:
-            results['search'] = {'time': None, 'status': 'error', 'error': str(e)}
-            print(f"[ERROR] Search Error: {e}")
-    else:
-        results['search'] = {'time': None, 'status': 'not_initialized'}
-        print("[WARN] Search tool not initialized")
+    print("Testing Generator, Verifier, Comparer and Search concurrently...")
+    wall_start = time.perf_counter()
+    outcomes = await asyncio.gather(*(
+        _time_probe(name, label, model, make_call)
+        for name, (label, model, make_call) in probes.items()
+    ))
+    wall_time = time.perf_counter() - wall_start
+    results = dict(zip(probes, outcomes))
     
     # Summary
     print("\n" + "=" * 60)
@@ -138,9 +101,16 @@ def test_model_times(query: str = "What is the capital of France?"):
     
     print("-" * 40)
     print(f"{'Total':12} : {total_time:.2f}s")
+    print(f"{'Wall clock':12} : {wall_time:.2f}s")
+    cache_stats = get_llm_cache_stats()
+    print(f"{'LLM cache':12} : {cache_stats['hits']} hits / {cache_stats['misses']} misses")
     print("=" * 60)
     
     return results
 
+def test_model_times(query: str = "What is the capital of France?"):
+    """Synchronous wrapper around atest_model_times."""
+    return asyncio.run(atest_model_times(query))
+
 if __name__ == "__main__":
     test_model_times()